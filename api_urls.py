@@ -0,0 +1,10 @@
+from django.urls import path, include
+from .metrics import metrics_view
+
+# URLconf for WORKER_PROFILE=api workers: the token-authenticated APIs
+# without the admin, which lives on the full-profile workers.
+urlpatterns = [
+    path('auth/', include('authentication.urls')),
+    path('host/', include('origon.host_urls')),
+    path('metrics', metrics_view, name='metrics'),
+]
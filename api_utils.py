@@ -0,0 +1,38 @@
+import json
+import math
+
+from django.http import JsonResponse
+from rest_framework import status
+
+
+def parse_json_body(request):
+    """
+    Decode a JSON request body, returning None if it is not valid JSON
+    """
+    try:
+        data = json.loads(request.body or b'{}')
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def bad_json_response():
+    return JsonResponse({'detail': 'Request body must be a JSON object.'}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def throttled_response(wait):
+    response = JsonResponse(
+        {'detail': f'Request was throttled. Expected available in {math.ceil(wait)} seconds.'},
+        status=status.HTTP_429_TOO_MANY_REQUESTS
+    )
+    response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+def busy_response():
+    response = JsonResponse(
+        {'detail': 'Too many concurrent logins, please retry shortly.'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    response['Retry-After'] = '1'
+    return response
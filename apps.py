@@ -1,7 +0,0 @@
-from django.apps import AppConfig
-
-
-class HostAuthConfig(AppConfig):
-    default_auto_field = 'django.db.models.BigAutoField'
-    name = 'host_auth'
-    verbose_name = 'Host Authentication'
\ No newline at end of file
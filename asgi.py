@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'origon.settings')
+# Route login/registration to the async views that hash off the event loop
+os.environ.setdefault('DJANGO_ROOT_URLCONF', 'origon.asgi_urls')
 
 application = get_asgi_application()
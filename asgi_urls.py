@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.urls import path, include
+from authentication import async_views as user_async_views
+from . import async_views
+
+# ASGI workers serve the hashing-heavy endpoints from async views and
+# everything else from the regular URLconf.
+urlpatterns = [
+    path('host/api/register/', async_views.HostRegisterAsyncView.as_view(), name='api_host_register_async'),
+    path('host/api/login/', async_views.HostLoginAsyncView.as_view(), name='api_host_login_async'),
+    path('auth/api/register/', user_async_views.RegisterAsyncView.as_view(), name='api_register_async'),
+    path('auth/api/login/', user_async_views.LoginAsyncView.as_view(), name='api_login_async'),
+    path('', include('origon.api_urls' if getattr(settings, 'WORKER_PROFILE', 'full') == 'api' else 'origon.urls')),
+]
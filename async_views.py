@@ -0,0 +1,85 @@
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+
+from .api_utils import parse_json_body, bad_json_response, busy_response, throttled_response
+from .auth_tokens import issue_tokens
+from .hashing import HashingPoolFull, hashing_pool
+from .login_events import DISABLED, FAILURE, SUCCESS, record_login
+from .rate_limit import check_auth_attempt, client_ip
+from .serializers import HostRegistrationSerializer, HostLoginSerializer, FastHostSerializer
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class HostRegisterAsyncView(View):
+    """
+    Async host registration for the ASGI entry point
+    """
+
+    async def post(self, request):
+        data = parse_json_body(request)
+        if data is None:
+            return bad_json_response()
+        wait = check_auth_attempt('register', client_ip(request))
+        if wait is not None:
+            return throttled_response(wait)
+        serializer = HostRegistrationSerializer(data=data)
+        if not await sync_to_async(serializer.is_valid)():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            encoded = await hashing_pool.make_password(serializer.validated_data['password'])
+        except HashingPoolFull:
+            return busy_response()
+        host = await sync_to_async(serializer.save)(encoded_password=encoded)
+        return JsonResponse({
+            'message': 'Host registered successfully',
+            'host': FastHostSerializer(host).data,
+            **await sync_to_async(issue_tokens)(host)
+        }, status=status.HTTP_201_CREATED)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class HostLoginAsyncView(View):
+    """
+    Async host login for the ASGI entry point
+    """
+
+    async def post(self, request):
+        data = parse_json_body(request)
+        if data is None:
+            return bad_json_response()
+        wait = check_auth_attempt('login', client_ip(request), data.get('email'))
+        if wait is not None:
+            return throttled_response(wait)
+        serializer = HostLoginSerializer(data=data, context={'defer_password_check': True})
+        if not await sync_to_async(serializer.is_valid)():
+            record_login('host', request, FAILURE, data=data)
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        host = serializer.validated_data['host']
+        try:
+            valid = await hashing_pool.check_password(
+                serializer.validated_data['password'], host.password if host else None
+            )
+        except HashingPoolFull:
+            return busy_response()
+        if not valid:
+            record_login('host', request, FAILURE, host, data)
+            return JsonResponse(
+                {'non_field_errors': ['Invalid email or password.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not host.is_active:
+            record_login('host', request, DISABLED, host)
+            return JsonResponse(
+                {'non_field_errors': ['Host account is disabled.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        record_login('host', request, SUCCESS, host)
+        return JsonResponse({
+            'message': 'Host login successful',
+            'host': FastHostSerializer(host).data,
+            **await sync_to_async(issue_tokens)(host)
+        }, status=status.HTTP_200_OK)
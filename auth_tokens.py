@@ -0,0 +1,211 @@
+import copy
+import threading
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken, Token as SignedToken
+from rest_framework_simplejwt.utils import datetime_from_epoch, get_md5_hash_password
+
+from authentication.models import RevokedToken
+from .models import CustomHost, HostToken
+from .routing import pin_credentials
+from .token_cache import token_cache
+from .token_expiry import token_expired
+
+# Claim naming the user's model, since hosts and users have separate tables
+USER_TYPE_CLAIM = 'utype'
+
+
+def signed_mode():
+    return getattr(settings, 'AUTH_TOKEN_MODE', 'database') == 'signed'
+
+
+def user_models():
+    labels = getattr(settings, 'SIGNED_TOKEN_USER_MODELS', [settings.AUTH_USER_MODEL])
+    return {label.lower(): label for label in labels}
+
+
+class RevocationList:
+    """
+    In-memory copy of the RevokedToken table. Checking a token never touches
+    the database; the copy catches up with other processes' revocations at
+    most once per sync_interval seconds, reading only recent rows.
+    """
+    # Rows are re-read this far back so a slow commit from another process
+    # is not missed
+    overlap = timedelta(seconds=30)
+
+    def __init__(self, sync_interval=5):
+        self.sync_interval = sync_interval
+        self._expires = {}
+        self._synced_at = None
+        self._synced_from = None
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti):
+        now = time.monotonic()
+        if self._synced_at is None or now - self._synced_at >= self.sync_interval:
+            self.sync(now)
+        return jti in self._expires
+
+    def sync(self, now=None):
+        with self._lock:
+            current = timezone.now()
+            rows = RevokedToken.objects.filter(expires_at__gt=current)
+            if self._synced_from is not None:
+                rows = rows.filter(revoked_at__gte=self._synced_from - self.overlap)
+            # Expired tokens fail the signature check anyway
+            self._expires = {jti: exp for jti, exp in self._expires.items() if exp > current}
+            self._expires.update(rows.values_list('jti', 'expires_at'))
+            self._synced_from = current
+            self._synced_at = now or time.monotonic()
+
+    def revoke(self, token):
+        jti = token[jwt_settings.JTI_CLAIM]
+        expires_at = datetime_from_epoch(token['exp'])
+        RevokedToken.objects.bulk_create([RevokedToken(jti=jti, expires_at=expires_at)], ignore_conflicts=True)
+        with self._lock:
+            self._expires[jti] = expires_at
+
+    def clear(self):
+        with self._lock:
+            self._expires = {}
+            self._synced_at = None
+            self._synced_from = None
+
+
+revocation_list = RevocationList(getattr(settings, 'SIGNED_TOKEN_REVOCATION_SYNC', 5))
+
+
+def token_model(user):
+    # DRF's Token can only point at AUTH_USER_MODEL
+    return HostToken if isinstance(user, CustomHost) else Token
+
+
+def refresh_for_user(user):
+    refresh = RefreshToken.for_user(user)
+    refresh[USER_TYPE_CLAIM] = user._meta.label_lower
+    return refresh
+
+
+def issue_tokens(user, token=None):
+    """
+    Response fields carrying the credentials for a freshly authenticated
+    user: a DRF Token (HostToken for hosts) key, or a signed access/refresh
+    pair in signed mode. `token` is an already created one to reuse in
+    database mode.
+    """
+    if signed_mode():
+        refresh = refresh_for_user(user)
+        access = str(refresh.access_token)
+        pin_credentials(f'{jwt_settings.AUTH_HEADER_TYPES[0]} {access}')
+        return {'token': access, 'refresh': str(refresh)}
+    if token is None:
+        model = token_model(user)
+        token, created = model.objects.get_or_create(user=user)
+        if not created and token_expired(token):
+            # An expired key is never revived; the user gets a new one
+            token.delete()
+            token = model.objects.create(user=user)
+    pin_credentials(f'{TokenAuthentication.keyword} {token.key}')
+    return {'token': token.key}
+
+
+def user_from_token(validated_token):
+    """
+    Resolve the user a signed token was issued to, checking the revocation
+    list, active flag and password-change claim
+    """
+    if revocation_list.is_revoked(validated_token[jwt_settings.JTI_CLAIM]):
+        raise AuthenticationFailed('Token has been revoked.', code='token_revoked')
+    label = user_models().get(validated_token.get(USER_TYPE_CLAIM, ''))
+    try:
+        user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken('Token contained no recognizable user identification')
+    if label is None:
+        raise InvalidToken('Token names an unknown user type')
+
+    cache_key = f'signed:{label.lower()}:{user_id}'
+    cached = token_cache.get(cache_key)
+    if cached is not None:
+        # Views mutate request.user, so never hand out the cached instance
+        user = copy.copy(cached[0])
+    else:
+        model = apps.get_model(label)
+        # Read before the row, so a password change or deactivation committed
+        # in another process while we load it still evicts this entry
+        generation = token_cache.generation(label.lower(), user_id)
+        try:
+            user = model.objects.get(**{jwt_settings.USER_ID_FIELD: user_id})
+        except model.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        token_cache.set(cache_key, user, None, generation)
+
+    if not user.is_active:
+        raise AuthenticationFailed('User is inactive', code='user_inactive')
+    # The claim carries a digest of the password hash at issue time, so a
+    # password change revokes every earlier token without any list entry
+    if validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+        raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+    return user
+
+
+class SignedTokenAuthentication(JWTAuthentication):
+    """
+    Authenticates `Authorization: Bearer <access token>` by verifying the
+    signature locally. The user comes from the in-process cache shared with
+    CachedTokenAuthentication, so a warm request makes no database query;
+    the cached user's password digest and active flag are as fresh as that
+    cache's cross-process invalidation allows (see TokenCache).
+    """
+
+    def get_user(self, validated_token):
+        return user_from_token(validated_token)
+
+
+def refresh_access_token(raw_refresh):
+    """
+    New access token for a refresh token, with the same checks as an access
+    token; raises AuthenticationFailed/InvalidToken when it is not usable
+    """
+    try:
+        refresh = RefreshToken(raw_refresh)
+    except TokenError as exc:
+        raise InvalidToken(exc.args[0])
+    user_from_token(refresh)
+    return str(refresh.access_token)
+
+
+def revoke_request_tokens(request):
+    """
+    Logout in signed mode: revoke the presented access token and, when the
+    client sends it, the matching refresh token
+    """
+    revocation_list.revoke(request.auth)
+    raw_refresh = request.data.get('refresh') if hasattr(request.data, 'get') else None
+    if not raw_refresh:
+        return
+    try:
+        refresh = RefreshToken(raw_refresh)
+    except TokenError as exc:
+        raise InvalidToken(exc.args[0])
+    same_user = (
+        refresh.get(jwt_settings.USER_ID_CLAIM) == request.auth.get(jwt_settings.USER_ID_CLAIM)
+        and refresh.get(USER_TYPE_CLAIM) == request.auth.get(USER_TYPE_CLAIM)
+    )
+    if same_user:
+        revocation_list.revoke(refresh)
+
+
+def is_signed_token(auth):
+    return isinstance(auth, SignedToken)
@@ -0,0 +1,75 @@
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from origon.api_utils import parse_json_body, bad_json_response, busy_response, throttled_response
+from origon.auth_tokens import issue_tokens
+from origon.hashing import HashingPoolFull, hashing_pool
+from origon.login_events import DISABLED, FAILURE, SUCCESS, record_login
+from origon.rate_limit import check_auth_attempt, client_ip
+from .serializers import UserRegistrationSerializer, UserLoginSerializer, FastUserSerializer
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class RegisterAsyncView(View):
+    # async registration view for the ASGI entry point
+
+    async def post(self, request):
+        data = parse_json_body(request)
+        if data is None:
+            return bad_json_response()
+        wait = check_auth_attempt('register', client_ip(request))
+        if wait is not None:
+            return throttled_response(wait)
+        serializer = UserRegistrationSerializer(data=data)
+        if not await sync_to_async(serializer.is_valid)():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            encoded = await hashing_pool.make_password(serializer.validated_data['password'])
+        except HashingPoolFull:
+            return busy_response()
+        user = await sync_to_async(serializer.save)(encoded_password=encoded)
+        return JsonResponse({
+            'message': 'User registered successfully',
+            'user': FastUserSerializer(user).data,
+            **await sync_to_async(issue_tokens)(user)
+        }, status=status.HTTP_201_CREATED)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class LoginAsyncView(View):
+    # async login view for the ASGI entry point
+
+    async def post(self, request):
+        data = parse_json_body(request)
+        if data is None:
+            return bad_json_response()
+        wait = check_auth_attempt('login', client_ip(request), data.get('email'))
+        if wait is not None:
+            return throttled_response(wait)
+        serializer = UserLoginSerializer(data=data, context={'defer_password_check': True})
+        if not await sync_to_async(serializer.is_valid)():
+            record_login('user', request, FAILURE, data=data)
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        user = serializer.validated_data['user']
+        try:
+            valid = await hashing_pool.check_password(
+                serializer.validated_data['password'], user.password if user else None
+            )
+        except HashingPoolFull:
+            return busy_response()
+        # Mirrors ModelBackend: inactive users fail the same way as bad passwords
+        if not valid or not user.is_active:
+            record_login('user', request, FAILURE if not valid else DISABLED, user, data)
+            return JsonResponse(
+                {'non_field_errors': ['Invalid email or password.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        record_login('user', request, SUCCESS, user)
+        return JsonResponse({
+            'message': 'Login successful',
+            'user': FastUserSerializer(user).data,
+            **await sync_to_async(issue_tokens)(user)
+        }, status=status.HTTP_200_OK)
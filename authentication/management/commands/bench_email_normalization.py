@@ -0,0 +1,49 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from email_validator import validate_email, EmailNotValidError
+
+from origon.email_normalization import InvalidEmailError, cache_stats, clear_cache, normalize_email
+
+
+def per_call(value):
+    # The pre-cache serializer path, minus the DNS lookup
+    value = value.lower().strip()
+    try:
+        return validate_email(value, check_deliverability=False).email
+    except EmailNotValidError:
+        return None
+
+
+def cached(value):
+    try:
+        return normalize_email(value)
+    except InvalidEmailError:
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Compare memoized email normalization against validating on every call'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=50000)
+        parser.add_argument('--distinct', type=int, default=2000, help='Distinct addresses in the workload')
+        parser.add_argument('--invalid-ratio', type=float, default=0.1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        addresses = [
+            f'user{i}@@example.com' if rng.random() < options['invalid_ratio'] else f' User{i}@Example.com '
+            for i in range(options['distinct'])
+        ]
+        workload = [rng.choice(addresses) for _ in range(options['calls'])]
+
+        clear_cache()
+        for name, fn in (('per-call', per_call), ('memoized', cached)):
+            start = time.perf_counter()
+            for value in workload:
+                fn(value)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f'{name}: {elapsed / len(workload) * 1e6:.2f} us/call')
+        self.stdout.write(f'cache: {cache_stats()}')
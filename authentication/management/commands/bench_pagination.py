@@ -0,0 +1,80 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from rest_framework.pagination import Cursor
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from origon.pagination import KeysetPagination, NumberedPagination
+
+PREFIX = 'bench-page-'
+
+
+class Command(BaseCommand):
+    help = 'Compare page-number and keyset page latency at increasing depths of the host table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic hosts afterwards')
+
+    def handle(self, *args, **options):
+        CustomHost = apps.get_model('host_auth', 'CustomHost')
+        queryset = CustomHost.objects.filter(username__startswith=PREFIX)
+        existing = queryset.count()
+        if existing < options['rows']:
+            self.seed(CustomHost, existing, options['rows'])
+
+        factory = APIRequestFactory(SERVER_NAME='localhost')
+        page_size = self.paginator(KeysetPagination).page_size
+        total = queryset.count()
+        try:
+            # A set, since the computed depths can repeat the fixed ones on smaller tables
+            for depth in sorted({0, 10000, 100000, total // 2, total - page_size}):
+                if depth < 0 or depth >= total:
+                    continue
+                page = depth // page_size + 1
+                numbered = self.measure(options['repeat'], lambda: self.paginator(NumberedPagination).paginate_queryset(
+                    queryset.order_by('-id'), Request(factory.get('/', {'page': page}))
+                ))
+
+                # Position of the row a client would reach by following cursors
+                position = queryset.order_by('-id').values_list('id', flat=True)[depth]
+                keyset = KeysetPagination()
+                keyset.base_url = 'http://localhost/'
+                cursor = keyset.encode_cursor(Cursor(offset=0, reverse=False, position=position + 1))
+                keyset_time = self.measure(options['repeat'], lambda: self.paginator(KeysetPagination).paginate_queryset(
+                    queryset, Request(factory.get(cursor))
+                ))
+                self.stdout.write(
+                    f'depth {depth:>8}: page-number {numbered * 1000:8.2f} ms, keyset {keyset_time * 1000:8.2f} ms'
+                )
+        finally:
+            if not options['keep']:
+                queryset.delete()
+
+    def paginator(self, cls):
+        paginator = cls()
+        paginator.page_size = 20
+        return paginator
+
+    def measure(self, repeat, fn):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def seed(self, model, start, rows, batch_size=5000):
+        self.stdout.write(f'Seeding {rows - start} hosts...')
+        for offset in range(start, rows, batch_size):
+            model.objects.bulk_create([
+                model(
+                    username=f'{PREFIX}{i}', email=f'{PREFIX}{i}@example.com',
+                    full_name=f'Host {i}', phone_number='0000000000', password='!'
+                )
+                for i in range(offset, min(offset + batch_size, rows))
+            ])
@@ -0,0 +1,62 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from authentication.serializers import FastUserSerializer, UserSerializer
+from origon.serializers import FastHostSerializer, HostSerializer
+
+PREFIX = 'bench-ser-'
+
+
+class Command(BaseCommand):
+    help = 'Compare HostSerializer/UserSerializer with their fast read paths and check the output is identical'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        CustomHost = apps.get_model('host_auth', 'CustomHost')
+        User = FastUserSerializer.serializer_class.Meta.model
+        rows = options['rows']
+        for model in (CustomHost, User):
+            model.objects.bulk_create([
+                model(
+                    username=f'{PREFIX}{i}', email=f'{PREFIX}{i}@example.com', full_name=f'Bench {i}',
+                    phone_number='0000000000', password='!'
+                )
+                for i in range(rows)
+            ])
+
+        try:
+            for model, slow, fast in ((CustomHost, HostSerializer, FastHostSerializer), (User, UserSerializer, FastUserSerializer)):
+                queryset = model.objects.filter(username__startswith=PREFIX).order_by('id')
+                instances = list(queryset)
+                cases = (
+                    ('single', lambda: slow(instances[0]).data, lambda: fast(instances[0]).data),
+                    (f'{rows} objects', lambda: slow(instances, many=True).data, lambda: fast(instances, many=True).data),
+                    (f'{rows} from queryset', lambda: slow(queryset, many=True).data, lambda: fast.from_queryset(queryset)),
+                )
+                for label, slow_fn, fast_fn in cases:
+                    if JSONRenderer().render(slow_fn()) != JSONRenderer().render(fast_fn()):
+                        raise CommandError(f'{fast.__name__} output differs for {label}')
+                    slow_time = self.measure(options['repeat'], slow_fn)
+                    fast_time = self.measure(options['repeat'], fast_fn)
+                    self.stdout.write(
+                        f'{slow.__name__} {label}: {slow_time * 1e3:.3f} ms -> {fast_time * 1e3:.3f} ms '
+                        f'({slow_time / fast_time:.1f}x)'
+                    )
+        finally:
+            for model in (CustomHost, User):
+                model.objects.filter(username__startswith=PREFIX).delete()
+
+    def measure(self, repeat, fn):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
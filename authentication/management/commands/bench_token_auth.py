@@ -0,0 +1,52 @@
+import time
+from contextlib import ExitStack
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from origon.token_cache import CachedTokenAuthentication, token_cache
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Compare DB queries and time per request for token authentication with and without the cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        user, _ = User.objects.get_or_create(
+            email='bench-token@example.com',
+            defaults={'username': 'bench-token', 'full_name': 'Bench Token'},
+        )
+        token, _ = Token.objects.get_or_create(user=user)
+        token_cache.clear()
+
+        try:
+            for name, backend in (
+                ('TokenAuthentication', TokenAuthentication()),
+                ('CachedTokenAuthentication', CachedTokenAuthentication()),
+            ):
+                # Reads may be routed to a replica, so every alias is watched
+                with ExitStack() as stack:
+                    captures = [
+                        stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections
+                    ]
+                    start = time.perf_counter()
+                    for _ in range(count):
+                        backend.authenticate_credentials(token.key)
+                    elapsed = time.perf_counter() - start
+                queries = sum(len(ctx.captured_queries) for ctx in captures)
+                self.stdout.write(
+                    f'{name}: {queries / count:.3f} queries/request, '
+                    f'{elapsed / count * 1e6:.1f} us/request'
+                )
+        finally:
+            token_cache.clear()
+            user.delete()
@@ -0,0 +1,189 @@
+import csv
+import json
+import os
+from itertools import islice
+
+from django.contrib.auth.hashers import identify_hasher
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from authentication.serializers import UserRegistrationSerializer, build_user
+from origon.facets import record_created
+from origon.hashing import HashingPool
+from origon.models import CustomHost
+from origon.serializers import HostRegistrationSerializer, build_host
+
+ACCOUNT_TYPES = {
+    'host': (HostRegistrationSerializer, build_host),
+    'user': (UserRegistrationSerializer, build_user),
+}
+
+
+def read_rows(path, fmt):
+    """
+    Yield (line_number, row) pairs without loading the whole file
+    """
+    with open(path, newline='', encoding='utf-8') as handle:
+        if fmt == 'csv':
+            for line_number, row in enumerate(csv.DictReader(handle), start=1):
+                # Empty CSV cells mean "not provided", not an empty string
+                yield line_number, {key: value for key, value in row.items() if value not in ('', None)}
+        else:
+            for line_number, line in enumerate(handle, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield line_number, row
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def prehashed_serializer(base):
+    # Same validation minus the raw password fields, which an import of
+    # already-hashed passwords does not have
+    class PrehashedSerializer(base):
+        password = None
+        password_confirm = None
+
+        class Meta(base.Meta):
+            fields = tuple(f for f in base.Meta.fields if f not in ('password', 'password_confirm'))
+
+        def validate(self, vald):
+            return vald
+
+    return PrehashedSerializer
+
+
+class Command(BaseCommand):
+    help = 'Stream hosts or users from a CSV/JSONL file into the database in batched transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--type', choices=sorted(ACCOUNT_TYPES), default='host')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument(
+            '--pre-hashed', action='store_true',
+            help='The password column holds Django password hashes instead of raw passwords'
+        )
+        parser.add_argument('--checkpoint', help='Defaults to <path>.checkpoint')
+        parser.add_argument('--errors', help='Write rejected rows as JSONL; defaults to <path>.errors.jsonl')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'{path} does not exist')
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+        serializer_class, self.build = ACCOUNT_TYPES[options['type']]
+        self.pre_hashed = options['pre_hashed']
+        if self.pre_hashed:
+            serializer_class = prehashed_serializer(serializer_class)
+        self.serializer_class = serializer_class
+        batch_size = options['batch_size']
+        self.pool = HashingPool(kind='process', max_workers=options['workers'], max_queue=batch_size)
+
+        checkpoint_path = options['checkpoint'] or f'{path}.checkpoint'
+        resume_after = self.read_checkpoint(checkpoint_path)
+        if resume_after:
+            self.stdout.write(f'Resuming after line {resume_after}')
+
+        created = rejected = 0
+        rows = ((n, row) for n, row in read_rows(path, fmt) if n > resume_after)
+        with open(options['errors'] or f'{path}.errors.jsonl', 'a', encoding='utf-8') as errors_file:
+            for batch in batched(rows, batch_size):
+                errors = []
+                created += self.import_batch(batch, errors)
+                rejected += len(errors)
+                for line_number, error in errors:
+                    errors_file.write(json.dumps({'line': line_number, 'errors': error}, default=str) + '\n')
+                errors_file.flush()
+                # Only advance once the batch is committed, so a crash replays it
+                self.write_checkpoint(checkpoint_path, batch[-1][0])
+                self.stdout.write(f'line {batch[-1][0]}: {created} created, {rejected} rejected')
+
+        self.stdout.write(self.style.SUCCESS(f'Done: {created} created, {rejected} rejected'))
+
+    def import_batch(self, batch, errors):
+        valid = []
+        seen_emails = set()
+        seen_usernames = set()
+        for line_number, row in batch:
+            if not isinstance(row, dict):
+                errors.append((line_number, {'non_field_errors': ['Row is not a JSON object.']}))
+                continue
+            serializer = self.serializer_class(data=row)
+            if not serializer.is_valid():
+                errors.append((line_number, serializer.errors))
+                continue
+            vald = serializer.validated_data
+            if vald['email'] in seen_emails or vald['username'] in seen_usernames:
+                errors.append((line_number, {'non_field_errors': ['Duplicate email or username in this batch.']}))
+                continue
+            if self.pre_hashed:
+                try:
+                    identify_hasher(row.get('password') or '')
+                except ValueError:
+                    errors.append((line_number, {'password': ['Not a recognised password hash.']}))
+                    continue
+            seen_emails.add(vald['email'])
+            seen_usernames.add(vald['username'])
+            valid.append((line_number, row, vald))
+
+        if not valid:
+            return 0
+        if self.pre_hashed:
+            encoded = [row['password'] for _, row, _ in valid]
+        else:
+            encoded = self.pool.make_passwords([vald['password'] for _, _, vald in valid])
+        accounts = [
+            (line_number, self.build(vald, encoded_password))
+            for (line_number, _, vald), encoded_password in zip(valid, encoded)
+        ]
+        model = type(accounts[0][1])
+        try:
+            with transaction.atomic():
+                created = model.objects.bulk_create([account for _, account in accounts])
+                if model is CustomHost:
+                    # bulk_create sends no post_save, so facet counts are fed here
+                    record_created(created)
+            return len(accounts)
+        except IntegrityError:
+            pass
+
+        # Something already in the table collided after validation; isolate it
+        inserted = 0
+        for line_number, account in accounts:
+            account.pk = None
+            account._state.adding = True
+            try:
+                with transaction.atomic():
+                    account.save()
+            except IntegrityError:
+                errors.append((line_number, {'non_field_errors': ['Email or username already exists.']}))
+                continue
+            inserted += 1
+        return inserted
+
+    def read_checkpoint(self, checkpoint_path):
+        if not os.path.exists(checkpoint_path):
+            return 0
+        with open(checkpoint_path, encoding='utf-8') as handle:
+            return json.load(handle)['line']
+
+    def write_checkpoint(self, checkpoint_path, line_number):
+        tmp_path = f'{checkpoint_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            json.dump({'line': line_number}, handle)
+        os.replace(tmp_path, checkpoint_path)
@@ -0,0 +1,130 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from itertools import count
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from origon.models import CustomHost
+
+PREFIX = 'loadtest-'
+
+
+class Command(BaseCommand):
+    help = 'Concurrent host registration + login load test against the configured database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run')
+        parser.add_argument(
+            '--fast-hashing', action='store_true',
+            help='Use MD5 password hashing so the database, not PBKDF2, is the bottleneck'
+        )
+        parser.add_argument(
+            '--compare', action='store_true',
+            help='Run once with SQLITE_PROFILE=basic and once with production, in subprocesses'
+        )
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            return self.compare(options)
+        hashers = ['django.contrib.auth.hashers.MD5PasswordHasher'] if options['fast_hashing'] \
+            else settings.PASSWORD_HASHERS
+        with override_settings(PASSWORD_HASHERS=hashers):
+            try:
+                self.run_load(options['threads'], options['duration'])
+            finally:
+                CustomHost.objects.filter(username__startswith=PREFIX).delete()
+
+    def compare(self, options):
+        for profile in ('basic', 'production'):
+            self.stdout.write(f'--- SQLITE_PROFILE={profile}')
+            command = [
+                sys.executable, sys.argv[0], 'loadtest_auth',
+                '--threads', str(options['threads']), '--duration', str(options['duration']),
+            ]
+            if options['fast_hashing']:
+                command.append('--fast-hashing')
+            result = subprocess.run(
+                command, env={**os.environ, 'SQLITE_PROFILE': profile}, capture_output=True, text=True
+            )
+            self.stdout.write(result.stdout.rstrip())
+            if result.returncode:
+                raise CommandError(f'SQLITE_PROFILE={profile} run failed: {result.stderr.strip()}')
+
+    def run_load(self, threads, duration):
+        register_url = reverse('host_auth:api_host_register')
+        login_url = reverse('host_auth:api_host_login')
+        deadline = time.monotonic() + duration
+        latencies = []
+        failures = []
+        lock = threading.Lock()
+        # Every simulated signup comes from its own address, as real ones
+        # would, so the per-address rate limits apply without throttling the
+        # whole run
+        addresses = count(1)
+
+        def worker():
+            client = Client(SERVER_NAME='localhost', raise_request_exception=False)
+            local_latencies = []
+            local_failures = []
+            try:
+                while time.monotonic() < deadline:
+                    name = f'{PREFIX}{uuid.uuid4().hex[:16]}'
+                    number = next(addresses)
+                    address = f'10.{number >> 16 & 255}.{number >> 8 & 255}.{number & 255}'
+                    email = f'{name}@example.com'
+                    password = 'Load-test-pass-42'
+                    for url, body in (
+                        (register_url, {
+                            'username': name, 'email': email, 'full_name': 'Load Test',
+                            'phone_number': '0000000000', 'password': password, 'password_confirm': password,
+                        }),
+                        (login_url, {'email': email, 'password': password}),
+                    ):
+                        start = time.perf_counter()
+                        response = client.post(url, body, content_type='application/json', REMOTE_ADDR=address)
+                        local_latencies.append(time.perf_counter() - start)
+                        if response.status_code >= 300:
+                            local_failures.append(response.status_code)
+            finally:
+                connections.close_all()
+                with lock:
+                    latencies.extend(local_latencies)
+                    failures.extend(local_failures)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        if not latencies:
+            self.stdout.write('No requests completed')
+            return
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        self.stdout.write(
+            f'profile={getattr(settings, "SQLITE_PROFILE", "?")} threads={threads} '
+            f'requests={len(latencies)} failed={len(failures)} '
+            f'throughput={len(latencies) / elapsed:.1f} req/s '
+            f'p50={percentile(0.5):.1f} ms p95={percentile(0.95):.1f} ms p99={percentile(0.99):.1f} ms'
+        )
+        if failures:
+            # Timings of error responses say nothing about the happy path
+            statuses = ', '.join(f'{code}: {n}' for code, n in sorted(Counter(failures).items()))
+            raise CommandError(f'{len(failures)} of {len(latencies)} requests failed ({statuses})')
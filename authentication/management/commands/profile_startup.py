@@ -0,0 +1,146 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter under -X importtime. Phase markers go to stderr
+# so they interleave with the import lines; timings go to stdout as JSON.
+CHILD = '''
+import io, json, sys, time
+start = time.perf_counter()
+cpu_start = time.process_time()
+sys.stderr.write('phase: setup\\n')
+import django
+django.setup()
+setup_done = time.perf_counter()
+sys.stderr.write('phase: first request\\n')
+from django.core.handlers.wsgi import WSGIHandler
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': PATH, 'QUERY_STRING': '', 'SERVER_NAME': HOST,
+    'SERVER_PORT': '80', 'REMOTE_ADDR': '127.0.0.1', 'wsgi.input': io.BytesIO(),
+    'wsgi.url_scheme': 'http', 'wsgi.errors': sys.stderr,
+}
+statuses = []
+body = WSGIHandler()(environ, lambda status, headers: statuses.append(status))
+b''.join(body)
+body.close()
+done = time.perf_counter()
+print(json.dumps({
+    'setup': setup_done - start, 'first_request': done - setup_done, 'total': done - start,
+    'cpu': time.process_time() - cpu_start, 'status': statuses[0], 'modules': len(sys.modules),
+}))
+'''
+
+
+def parse_importtime(stderr):
+    """
+    Turn -X importtime output into {phase: [root nodes]}; a node is
+    {'name', 'self', 'cumulative', 'children'} with times in milliseconds
+    """
+    phases = {}
+    phase = 'interpreter'
+    pending = defaultdict(list)
+    for line in stderr.splitlines():
+        if line.startswith('phase: '):
+            phases[phase] = pending[0]
+            phase = line[len('phase: '):]
+            pending = defaultdict(list)
+            continue
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        # importtime prints a module after everything it imported, so the
+        # entries one level deeper seen so far are its children
+        pending[depth].append({
+            'name': stripped,
+            'self': int(self_us) / 1000,
+            'cumulative': int(cumulative_us) / 1000,
+            'children': pending.pop(depth + 1, []),
+        })
+    phases[phase] = pending[0]
+    return phases
+
+
+def walk(nodes, depth=0):
+    for node in nodes:
+        yield depth, node
+        yield from walk(node['children'], depth + 1)
+
+
+class Command(BaseCommand):
+    help = 'Report the import-time tree of worker boot and time it to the first request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/host/api/verification-status/', help='First request path')
+        parser.add_argument('--min-ms', type=float, default=5.0, help='Hide imports cheaper than this')
+        parser.add_argument('--top', type=int, default=15, help='Slowest modules by self time to list')
+        parser.add_argument(
+            '--runs', type=int, default=0,
+            help='Instead of the tree, boot N fresh workers and report time-to-first-request'
+        )
+        parser.add_argument('--output', help='Write the timings or import tree as JSON')
+
+    def boot(self, path, importtime=False):
+        host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost'
+        code = f'PATH = {path!r}\nHOST = {host.lstrip(".")!r}\n' + CHILD
+        command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'origon.settings')}
+        result = subprocess.run(command, env=env, capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+    def handle(self, *args, **options):
+        if not getattr(settings, 'PRELOAD_AUTH_DEPENDENCIES', True):
+            self.stdout.write(self.style.WARNING(
+                'PRELOAD_AUTH_DEPENDENCIES is off: boot is shorter, but the first signup/login in '
+                'each worker loads email_validator and the password lists. Leave it on for servers.'
+            ))
+        if options['runs']:
+            return self.benchmark(options)
+        timings, stderr = self.boot(options['path'], importtime=True)
+        phases = parse_importtime(stderr)
+        for phase in ('setup', 'first request'):
+            roots = phases.get(phase, [])
+            total = sum(node['cumulative'] for node in roots)
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{phase}: {total:.1f} ms in imports'))
+            for depth, node in walk(roots):
+                if node['cumulative'] >= options['min_ms']:
+                    self.stdout.write(
+                        f'{node["cumulative"]:9.1f} {node["self"]:8.1f}  {"  " * depth}{node["name"]}'
+                    )
+        self.stdout.write(self.style.MIGRATE_HEADING(f'slowest {options["top"]} modules by self time'))
+        flat = [node for roots in phases.values() for _, node in walk(roots)]
+        for node in sorted(flat, key=lambda n: n['self'], reverse=True)[:options['top']]:
+            self.stdout.write(f'{node["self"]:9.1f}  {node["name"]}')
+        self.stdout.write(
+            f'setup {timings["setup"] * 1000:.1f} ms, first request {timings["first_request"] * 1000:.1f} ms '
+            f'({timings["status"]}), {timings["modules"]} modules (times include importtime overhead)'
+        )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump({'timings': timings, 'imports': phases}, handle, indent=2)
+
+    def benchmark(self, options):
+        runs = [self.boot(options['path'])[0] for _ in range(options['runs'])]
+        summary = {}
+        # cpu (process time, setup through first response) is the steadiest
+        # figure on a shared machine
+        for key in ('setup', 'first_request', 'total', 'cpu'):
+            values = [run[key] * 1000 for run in runs]
+            summary[key] = {'median': statistics.median(values), 'min': min(values), 'max': max(values)}
+            self.stdout.write(
+                f'{key:14} median {summary[key]["median"]:7.1f} ms  '
+                f'min {summary[key]["min"]:7.1f}  max {summary[key]["max"]:7.1f}'
+            )
+        self.stdout.write(f'{runs[0]["modules"]} modules loaded, first response {runs[0]["status"]}')
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump({'runs': runs, 'summary': summary}, handle, indent=2)
@@ -0,0 +1,295 @@
+import asyncio
+import contextvars
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from itertools import count
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+
+# Per-request query counter; a context variable so queries run by
+# sync_to_async threads under the ASGI handler are attributed correctly
+_query_count = contextvars.ContextVar('replay_query_count', default=None)
+
+
+def _count_queries(execute, sql, params, many, context):
+    counter = _query_count.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def _install_counter(connection):
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+def _connection_created(sender, connection, **kwargs):
+    _install_counter(connection)
+
+
+def load_records(path):
+    """
+    Read a JSONL request log: {"method", "path", "body", "token", "headers"}
+    per line; only path is required
+    """
+    records = []
+    with open(path, encoding='utf-8') as handle:
+        for line_number, line in enumerate(handle, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise CommandError(f'{path}:{line_number} is not valid JSON')
+            if not isinstance(record, dict) or not record.get('path'):
+                raise CommandError(f'{path}:{line_number} has no "path"')
+            records.append(record)
+    if not records:
+        raise CommandError(f'{path} has no requests')
+    return records
+
+
+def auth_header(token):
+    if not token:
+        return None
+    if token.startswith(('Token ', 'Bearer ')):
+        return token
+    # Signed tokens are dotted JWTs; DRF token keys are plain hex
+    return f'Bearer {token}' if '.' in token else f'Token {token}'
+
+
+def fill(text, run_id, seq):
+    return text.replace('{run}', run_id).replace('{seq}', str(seq))
+
+
+def prepare(record, run_id, seq):
+    """
+    (method, path, body bytes, headers) for one replay. "{run}" and "{seq}"
+    in the path or body become the replay's id and a per-request number, so
+    recorded registrations can be replayed repeatedly without colliding.
+    """
+    method = record.get('method', 'GET').upper()
+    path = fill(record['path'], run_id, seq)
+    body = record.get('body')
+    data = b''
+    if body is not None:
+        data = fill(body if isinstance(body, str) else json.dumps(body), run_id, seq).encode()
+    headers = dict(record.get('headers') or {})
+    authorization = auth_header(record.get('token'))
+    if authorization:
+        headers['Authorization'] = authorization
+    return method, path, data, headers
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(sample['latency'] for sample in samples)
+    errors = sum(1 for sample in samples if sample['status'] is None or sample['status'] >= 400)
+    queries = [sample['queries'] for sample in samples if sample['queries'] is not None]
+    statuses = defaultdict(int)
+    for sample in samples:
+        statuses[str(sample['status'])] += 1
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': errors / len(samples) if samples else 0.0,
+        'throughput': len(samples) / elapsed if elapsed else 0.0,
+        'latency_ms': {
+            'mean': sum(latencies) / len(latencies) * 1000 if latencies else None,
+            'p50': percentile(latencies, 0.50) * 1000 if latencies else None,
+            'p95': percentile(latencies, 0.95) * 1000 if latencies else None,
+            'p99': percentile(latencies, 0.99) * 1000 if latencies else None,
+            'max': latencies[-1] * 1000 if latencies else None,
+        },
+        'queries': {
+            'mean': sum(queries) / len(queries) if queries else None,
+            'max': max(queries) if queries else None,
+        },
+        'status': dict(statuses),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay a JSONL request log against the app (in-process WSGI/ASGI or a running server) '
+        'and report per-endpoint latency, throughput, errors and query counts'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSONL log: {"method": "POST", "path": "/host/api/login/", "body": {...}, "token": "..."}')
+        parser.add_argument(
+            '--mode', choices=['wsgi', 'asgi', 'http'], default='wsgi',
+            help='asgi serves through ROOT_URLCONF; set DJANGO_ROOT_URLCONF=origon.asgi_urls to replay the async views'
+        )
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Server for --mode http')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--repeat', type=int, default=1, help='Replay the log this many times')
+        parser.add_argument('--output', default='replay-results.json')
+        parser.add_argument('--compare', help='Earlier results file to print deltas against')
+
+    def handle(self, *args, **options):
+        records = load_records(options['path']) * options['repeat']
+        self.run_id = uuid.uuid4().hex[:8]
+        self.sequence = count(1)
+        self.samples = []
+        self.lock = threading.Lock()
+
+        connection_created.connect(_connection_created, dispatch_uid='replay_query_counter')
+        for connection in connections.all():
+            _install_counter(connection)
+        try:
+            started = time.perf_counter()
+            if options['mode'] == 'asgi':
+                asyncio.run(self.run_asgi(records, options['concurrency']))
+            else:
+                self.run_threads(records, options)
+            elapsed = time.perf_counter() - started
+        finally:
+            connection_created.disconnect(dispatch_uid='replay_query_counter')
+
+        by_endpoint = defaultdict(list)
+        for sample in self.samples:
+            by_endpoint[sample['endpoint']].append(sample)
+        results = {
+            'meta': {
+                'log': options['path'],
+                'run_id': self.run_id,
+                'mode': options['mode'],
+                'concurrency': options['concurrency'],
+                'finished_at': datetime.now(timezone.utc).isoformat(),
+                'duration_s': elapsed,
+            },
+            'overall': summarize(self.samples, elapsed),
+            'endpoints': {
+                endpoint: summarize(samples, elapsed) for endpoint, samples in sorted(by_endpoint.items())
+            },
+        }
+        with open(options['output'], 'w', encoding='utf-8') as handle:
+            json.dump(results, handle, indent=2)
+
+        self.report(results)
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as handle:
+                self.report_delta(json.load(handle), results)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+
+    def record_sample(self, method, path, status, latency, queries):
+        with self.lock:
+            self.samples.append({
+                'endpoint': f'{method} {path.split("?", 1)[0]}',
+                'status': status,
+                'latency': latency,
+                'queries': queries,
+            })
+
+    def run_threads(self, records, options):
+        queue = iter(records)
+        queue_lock = threading.Lock()
+        base_url = options['base_url'].rstrip('/')
+
+        def worker():
+            client = Client(SERVER_NAME='localhost', raise_request_exception=False)
+            try:
+                while True:
+                    with queue_lock:
+                        record = next(queue, None)
+                    if record is None:
+                        return
+                    method, path, data, headers = prepare(record, self.run_id, next(self.sequence))
+                    if options['mode'] == 'http':
+                        self.send_http(base_url, method, path, data, headers)
+                    else:
+                        self.send_wsgi(client, method, path, data, headers)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def send_wsgi(self, client, method, path, data, headers):
+        counter = [0]
+        token = _query_count.set(counter)
+        start = time.perf_counter()
+        try:
+            response = client.generic(method, path, data, content_type='application/json', headers=headers)
+            status = response.status_code
+        finally:
+            _query_count.reset(token)
+        self.record_sample(method, path, status, time.perf_counter() - start, counter[0])
+
+    def send_http(self, base_url, method, path, data, headers):
+        request = urllib.request.Request(
+            base_url + path, data=data or None, method=method,
+            headers={'Content-Type': 'application/json', **headers}
+        )
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as exc:
+            status = exc.code
+        except OSError:
+            status = None
+        # Queries happen in the server process and cannot be counted here
+        self.record_sample(method, path, status, time.perf_counter() - start, None)
+
+    async def run_asgi(self, records, concurrency):
+        client = AsyncClient(SERVER_NAME='localhost', raise_request_exception=False)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send(record):
+            async with semaphore:
+                method, path, data, headers = prepare(record, self.run_id, next(self.sequence))
+                counter = [0]
+                _query_count.set(counter)
+                start = time.perf_counter()
+                response = await client.generic(method, path, data, content_type='application/json', headers=headers)
+                self.record_sample(method, path, response.status_code, time.perf_counter() - start, counter[0])
+
+        # Each task runs in its own context, so counters do not mix
+        await asyncio.gather(*(send(record) for record in records))
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"endpoint":<40} {"reqs":>6} {"err%":>6} {"rps":>8} {"p50":>8} {"p95":>8} {"p99":>8} {"q/req":>6}'
+        )
+        rows = list(results['endpoints'].items()) + [('TOTAL', results['overall'])]
+        for endpoint, summary in rows:
+            latency = summary['latency_ms']
+            queries = summary['queries']['mean']
+            self.stdout.write(
+                f'{endpoint:<40} {summary["requests"]:>6} {summary["error_rate"] * 100:>5.1f}% '
+                f'{summary["throughput"]:>8.1f} {latency["p50"]:>7.1f}ms {latency["p95"]:>7.1f}ms '
+                f'{latency["p99"]:>7.1f}ms {"-" if queries is None else f"{queries:.1f}":>6}'
+            )
+
+    def report_delta(self, before, after):
+        self.stdout.write('Change against the earlier run (p95 latency, throughput):')
+        for endpoint, summary in after['endpoints'].items():
+            previous = before.get('endpoints', {}).get(endpoint)
+            if not previous:
+                continue
+            p95_before, p95_after = previous['latency_ms']['p95'], summary['latency_ms']['p95']
+            self.stdout.write(
+                f'  {endpoint:<40} p95 {p95_before:.1f} -> {p95_after:.1f} ms, '
+                f'{previous["throughput"]:.1f} -> {summary["throughput"]:.1f} req/s'
+            )
@@ -0,0 +1,65 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from authentication.models import RevokedToken
+
+from origon.models import HostToken
+from origon.token_expiry import expired_before
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired auth tokens in small batches, committing after each batch, '
+        'and revocation entries for signed tokens that have expired'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help="Defaults to TOKEN_EXPIRY['SWEEP_BATCH']")
+        parser.add_argument('--pause', type=float, default=0.05, help='Seconds to sleep between batches')
+        parser.add_argument('--limit', type=int, help='Stop after deleting this many tokens')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or getattr(settings, 'TOKEN_EXPIRY', {}).get('SWEEP_BATCH', 500)
+        cutoff = expired_before()
+        deleted = 0
+        # User tokens, then host tokens; the limit covers both
+        for model in (Token, HostToken):
+            deleted += self.sweep(model, cutoff, batch_size, options['pause'], options['limit'], deleted)
+        # A revoked signed token that has expired fails verification anyway;
+        # served by the expires_at index
+        revoked = 0
+        now = timezone.now()
+        while True:
+            ids = list(RevokedToken.objects.filter(expires_at__lte=now).values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            count, _ = RevokedToken.objects.filter(pk__in=ids).delete()
+            revoked += count
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} expired tokens and {revoked} expired revocations'
+        ))
+
+    def sweep(self, model, cutoff, batch_size, pause, limit, already_deleted):
+        deleted = 0
+        while limit is None or already_deleted + deleted < limit:
+            size = batch_size if limit is None else min(batch_size, limit - already_deleted - deleted)
+            # Served by the created index (authtoken_token_created_idx,
+            # host_token_created_idx); each batch is its own short write
+            # transaction
+            keys = list(model.objects.filter(created__lt=cutoff).values_list('key', flat=True)[:size])
+            if not keys:
+                break
+            with transaction.atomic():
+                # created is re-checked in case a renewal landed since the select
+                count, _ = model.objects.filter(key__in=keys, created__lt=cutoff).delete()
+            deleted += count
+            if pause:
+                time.sleep(pause)
+        return deleted
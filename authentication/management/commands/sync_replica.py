@@ -0,0 +1,47 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+def copy_database(source_path, replica_path):
+    """
+    Copy a live SQLite database page by page with the online backup API;
+    readers of the replica wait on their busy timeout while pages land
+    """
+    source = sqlite3.connect(source_path)
+    replica = sqlite3.connect(replica_path, timeout=30)
+    try:
+        source.backup(replica)
+    finally:
+        replica.close()
+        source.close()
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database onto a replica alias, once or every --interval seconds'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--replica', default='replica', help='Database alias of the replica copy')
+        parser.add_argument('--interval', type=float, help='Keep syncing, sleeping this many seconds in between')
+
+    def handle(self, *args, **options):
+        alias = options['replica']
+        if alias not in connections.settings:
+            raise CommandError(f'No database alias {alias!r}; set SQLITE_REPLICA to enable it')
+        primary = connections['default'].settings_dict
+        replica = connections[alias].settings_dict
+        if primary['ENGINE'] != replica['ENGINE'] or 'sqlite3' not in primary['ENGINE']:
+            raise CommandError('sync_replica only copies between SQLite databases')
+        source_path, replica_path = str(primary['NAME']), str(replica['NAME'])
+        if source_path == replica_path:
+            raise CommandError(f'{alias!r} is the primary database file')
+
+        while True:
+            start = time.perf_counter()
+            copy_database(source_path, replica_path)
+            self.stdout.write(f'Synced {alias} in {(time.perf_counter() - start) * 1000:.0f} ms')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # authtoken_token belongs to DRF, so its index is created by raw SQL here.
+    # Token expiry checks and the sweep_tokens command filter on created.
+
+    dependencies = [
+        ('authentication', '0003_revoked_token'),
+        ('authtoken', '0003_tokenproxy'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS authtoken_token_created_idx ON authtoken_token (created)',
+            'DROP INDEX IF EXISTS authtoken_token_created_idx',
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0004_token_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoginEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account_type', models.CharField(max_length=16)),
+                ('account_id', models.BigIntegerField(blank=True, null=True)),
+                ('email', models.CharField(max_length=254)),
+                ('ip', models.GenericIPAddressField(blank=True, null=True)),
+                ('outcome', models.CharField(max_length=16)),
+                ('created_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['account_type', 'account_id', 'created_at'], name='authenticat_account_311631_idx')],
+            },
+        ),
+    ]
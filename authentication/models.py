@@ -1,7 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from origon.versioning import VersionedModel
 
-class CustomUser(AbstractUser):
+class CustomUser(AbstractUser, VersionedModel):
     """
     Custom user model that extends Django's AbstractUser
     """
@@ -17,3 +18,32 @@ class CustomUser(AbstractUser):
         return self.full_name
     def get_short_name(self):
         return self.full_name.split()[0] if self.full_name else self.username
+
+
+class RevokedToken(models.Model):
+    """
+    Signed token (by jti) revoked before it expired, e.g. on logout.
+    Rows are useless once expires_at passes; sweep_tokens prunes them.
+    """
+    jti = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    def __str__(self):
+        return self.jti
+
+
+class LoginEvent(models.Model):
+    """
+    Audit record of a login attempt, written in batches by
+    origon.login_events. account_id is empty when no account matched.
+    """
+    account_type = models.CharField(max_length=16)
+    account_id = models.BigIntegerField(null=True, blank=True)
+    email = models.CharField(max_length=254)
+    ip = models.GenericIPAddressField(null=True, blank=True)
+    outcome = models.CharField(max_length=16)
+    created_at = models.DateTimeField(db_index=True)
+    class Meta:
+        indexes = [models.Index(fields=['account_type', 'account_id', 'created_at'])]
+    def __str__(self):
+        return f'{self.email} {self.outcome}'
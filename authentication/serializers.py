@@ -1,12 +1,16 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.password_validation import validate_password
-from email_validator import validate_email, EmailNotValidError
+from origon.email_normalization import InvalidEmailError, normalize_email
+from origon.fast_serializers import FastReadSerializer
+from origon.login_events import DISABLED, FAILURE
+from origon.metrics import TimedSerializerMixin
 
 User = get_user_model()
 
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+class UserRegistrationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, validators=[validate_password])
     password_confirm = serializers.CharField(write_only=True)
     email = serializers.EmailField(
@@ -32,14 +36,10 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return vald
 
     def validate_email(self, value):
-        # Normalize email to lowercase
-        value = value.lower().strip()
-        
         try:
-            # Use email-validator for robust validation
-            validated_email = validate_email(value)
-            value = validated_email.email  # Get the normalized email
-        except EmailNotValidError as e:
+            # Lowercase, strip and validate (memoized, no DNS lookups)
+            value = normalize_email(value)
+        except InvalidEmailError as e:
             raise serializers.ValidationError(f"Please enter a valid email address: {str(e)}")
         
         # Check if email already exists
@@ -48,15 +48,31 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return value
 
     def create(self, validated_data):
-        validated_data.pop('password_confirm')
-        password = validated_data.pop('password')
-        user = User.objects.create_user(**validated_data)
-        user.set_password(password)
+        # Async views hash on the hashing pool and pass the result in via save()
+        encoded_password = validated_data.pop('encoded_password', None)
+        user = build_user(validated_data, encoded_password)
         user.save()
         return user
 
 
-class UserLoginSerializer(serializers.Serializer):
+def build_user(validated_data, encoded_password=None):
+    # unsaved user with the password already set, so creating it is one INSERT
+    data = dict(validated_data)
+    data.pop('password_confirm', None)
+    password = data.pop('password', None)
+    user = User(**data)
+    user.email = User.objects.normalize_email(user.email)
+    user.username = User.normalize_username(user.username)
+    user.password = encoded_password or make_password(password)
+    return user
+
+
+class UserLoginSerializer(TimedSerializerMixin, serializers.Serializer):
+    # The account the email named and how the attempt ended, for the login
+    # audit; set by validate() even when validation fails
+    account = None
+    login_outcome = FAILURE
+
     email = serializers.EmailField(
         error_messages={
             'invalid': 'Please enter a valid email address.',
@@ -67,14 +83,10 @@ class UserLoginSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True)
 
     def validate_email(self, value):
-        # Normalize email to lowercase for consistent login
-        value = value.lower().strip()
-        
         try:
-            # Use email-validator for robust validation
-            validated_email = validate_email(value)
-            value = validated_email.email  # Get the normalized email
-        except EmailNotValidError as e:
+            # Lowercase, strip and validate (memoized, no DNS lookups)
+            value = normalize_email(value)
+        except InvalidEmailError as e:
             raise serializers.ValidationError(f"Please enter a valid email address: {str(e)}")
         
         return value
@@ -84,10 +96,23 @@ class UserLoginSerializer(serializers.Serializer):
         password = vald.get('password')
 
         if email and password:
+            if self.context.get('defer_password_check'):
+                # The caller checks the password off the request thread
+                vald['user'] = User.objects.filter(email=email).first()
+                return vald
             user = authenticate(username=email, password=password)
             if not user:
+                # authenticate() does not say which account failed or why, so
+                # the login audit looks the account up itself. Only a disabled
+                # account pays for a second password check.
+                self.account = User.objects.filter(email=email).first()
+                if self.account is not None and not self.account.is_active \
+                        and self.account.check_password(password):
+                    self.login_outcome = DISABLED
                 raise serializers.ValidationError('Invalid email or password.')
+            self.account = user
             if not user.is_active:
+                self.login_outcome = DISABLED
                 raise serializers.ValidationError('User account is disabled.')
             vald['user'] = user
             return vald
@@ -95,14 +120,19 @@ class UserLoginSerializer(serializers.Serializer):
             raise serializers.ValidationError('Must include email and password.')
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'full_name', 'phone_number', 'date_joined', 'is_active')
         read_only_fields = ('id', 'date_joined', 'is_active')
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class FastUserSerializer(FastReadSerializer):
+    # read-only fast path with the same output as UserSerializer
+    serializer_class = UserSerializer
+
+
+class UserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('full_name', 'phone_number')
@@ -114,7 +144,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
         return instance
 
 
-class ChangePasswordSerializer(serializers.Serializer):
+class ChangePasswordSerializer(TimedSerializerMixin, serializers.Serializer):
     old_password = serializers.CharField(write_only=True)
     new_password = serializers.CharField(write_only=True, validators=[validate_password])
     new_password_confirm = serializers.CharField(write_only=True)
@@ -0,0 +1,12 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('api/register/', views.RegisterAPIView.as_view(), name='api_register'),
+    path('api/login/', views.LoginAPIView.as_view(), name='api_login'),
+    path('api/logout/', views.LogoutAPIView.as_view(), name='api_logout'),
+    path('api/profile/', views.UserProfileAPIView.as_view(), name='api_profile'),
+    path('api/change-password/', views.ChangePasswordAPIView.as_view(), name='api_change_password'),
+    path('api/details/', views.user_detail_view, name='api_user_detail'),
+    path('api/token/refresh/', views.TokenRefreshAPIView.as_view(), name='api_token_refresh'),
+]
@@ -5,10 +5,14 @@ from rest_framework.views import APIView
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth import get_user_model
+from origon.auth_tokens import issue_tokens, is_signed_token, refresh_access_token, revoke_request_tokens
+from origon.login_events import SUCCESS, record_login
+from origon.rate_limit import LoginRateThrottle, RegisterRateThrottle
+from origon.versioning import conditional_response
 from .serializers import (
     UserRegistrationSerializer, 
     UserLoginSerializer, 
-    UserSerializer, 
+    FastUserSerializer, 
     UserProfileSerializer,
     ChangePasswordSerializer
 )
@@ -21,16 +25,16 @@ class RegisterAPIView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserRegistrationSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [RegisterRateThrottle]
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            token, created = Token.objects.get_or_create(user=user)
             return Response({
                 'message': 'User registered successfully',
-                'user': UserSerializer(user).data,
-                'token': token.key
+                'user': FastUserSerializer(user).data,
+                **issue_tokens(user)
             }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -38,17 +42,19 @@ class RegisterAPIView(generics.CreateAPIView):
 class LoginAPIView(APIView):
     # login view
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [LoginRateThrottle]
 
     def post(self, request):
         serializer = UserLoginSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            token, created = Token.objects.get_or_create(user=user)
+            record_login('user', request, SUCCESS, user)
             return Response({
                 'message': 'Login successful',
-                'user': UserSerializer(user).data,
-                'token': token.key
+                'user': FastUserSerializer(user).data,
+                **issue_tokens(user)
             }, status=status.HTTP_200_OK)
+        record_login('user', request, serializer.login_outcome, serializer.account, request.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -57,6 +63,12 @@ class LogoutAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
+        if is_signed_token(request.auth):
+            # Signed tokens cannot be deleted, so they are revoked instead
+            revoke_request_tokens(request)
+            return Response({
+                'message': 'Successfully logged out'
+            }, status=status.HTTP_200_OK)
         try:
             # Delete the user's token to logout
             request.user.auth_token.delete()
@@ -79,8 +91,9 @@ class UserProfileAPIView(generics.RetrieveUpdateAPIView):
 
     def get(self, request, *args, **kwargs):
         user = self.get_object()
-        serializer = UserSerializer(user)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return conditional_response(
+            request, user, 'user', lambda: Response(FastUserSerializer(user).data, status=status.HTTP_200_OK)
+        )
 
 
 class ChangePasswordAPIView(APIView):
@@ -94,7 +107,8 @@ class ChangePasswordAPIView(APIView):
             user.set_password(serializer.validated_data['new_password'])
             user.save()
 
-            # Delete all tokens to force re-login
+            # Delete all tokens to force re-login; signed tokens are already
+            # invalid because they carry a digest of the old password hash
             Token.objects.filter(user=user).delete()
             return Response({
                 'message': 'Password changed successfully. Please login again.'
@@ -102,10 +116,28 @@ class ChangePasswordAPIView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class TokenRefreshAPIView(APIView):
+    # exchanges a refresh token for a new signed access token (users and hosts)
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def get_authenticate_header(self, request):
+        # answer rejected refresh tokens with 401 rather than 403
+        return 'Bearer realm="api"'
+
+    def post(self, request):
+        raw_refresh = request.data.get('refresh') if hasattr(request.data, 'get') else None
+        if not raw_refresh:
+            return Response({'refresh': ['This field is required.']}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'token': refresh_access_token(raw_refresh)}, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def user_detail_view(request):
     
     # API view to get current user details
-    serializer = UserSerializer(request.user)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return conditional_response(
+        request, request.user, 'user',
+        lambda: Response(FastUserSerializer(request.user).data, status=status.HTTP_200_OK)
+    )
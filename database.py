@@ -0,0 +1,49 @@
+# SQLite connection profiles. Kept free of model imports so settings.py can
+# build DATABASES from here.
+
+# Applied on every new connection. journal_mode=WAL lets readers run while a
+# writer commits; synchronous=NORMAL is durable across application crashes
+# under WAL (only an OS crash can lose the last commits).
+PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,  # KiB, i.e. 64 MB of page cache per connection
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'ON',
+}
+
+
+def init_command(pragmas):
+    return ';'.join(f'PRAGMA {name}={value}' for name, value in pragmas.items())
+
+
+def sqlite_database(path, profile='production', read_only=False, conn_max_age=600):
+    """
+    DATABASES entry for an SQLite file.
+
+    'basic' is Django's default behaviour (rollback journal, one connection
+    per request). 'production' adds the pragmas above, keeps connections
+    open across requests and starts write transactions with BEGIN IMMEDIATE,
+    so a transaction that will write queues on busy_timeout up front instead
+    of failing with "database is locked" when it upgrades from a read.
+    read_only connections refuse writes (query_only) and keep plain BEGIN.
+    """
+    if profile == 'basic':
+        return {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path}
+    pragmas = dict(PRODUCTION_PRAGMAS)
+    if read_only:
+        pragmas['query_only'] = 1
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'CONN_MAX_AGE': conn_max_age,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': init_command(pragmas),
+            'transaction_mode': 'DEFERRED' if read_only else 'IMMEDIATE',
+            'timeout': PRODUCTION_PRAGMAS['busy_timeout'] / 1000,
+        },
+    }
+
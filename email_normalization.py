@@ -0,0 +1,59 @@
+from functools import lru_cache
+
+from django.conf import settings
+
+
+class InvalidEmailError(ValueError):
+    """
+    Raised by normalize_email for addresses email_validator rejects. Defined
+    here so callers can catch it without importing email_validator, which
+    is only loaded by the first login or registration.
+    """
+
+
+@lru_cache(maxsize=getattr(settings, 'EMAIL_NORMALIZATION_CACHE_SIZE', 4096))
+def _validate(value):
+    # Invalid addresses are cached too (as their error message), so repeated
+    # bad logins do not re-parse either
+    from email_validator import validate_email, EmailNotValidError
+
+    try:
+        # No DNS/MX lookups: keeps login and registration offline and predictable
+        return validate_email(value, check_deliverability=False).email, None
+    except EmailNotValidError as e:
+        return None, str(e)
+
+
+def preload_email_validator():
+    """
+    Import email_validator (and compile its patterns) now rather than in
+    the first login or registration
+    """
+    import email_validator  # noqa: F401
+
+
+def normalize_email(value):
+    """
+    Lowercase, strip and validate an email address, returning the normalized
+    form or raising InvalidEmailError. Results are memoized.
+    """
+    email, error = _validate(value.lower().strip())
+    if error is not None:
+        raise InvalidEmailError(error)
+    return email
+
+
+def cache_stats():
+    info = _validate.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'max_size': info.maxsize,
+        'hit_rate': info.hits / lookups if lookups else 0.0,
+    }
+
+
+def clear_cache():
+    _validate.cache_clear()
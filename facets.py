@@ -0,0 +1,138 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.signals import post_delete, post_init, post_save
+
+from .models import CustomHost, HostFacet
+
+FACET_FIELDS = ('city', 'country', 'business_type', 'is_verified', 'is_active')
+# Facet row holding the total number of hosts
+TOTAL = ('__all__', '')
+
+
+def facet_value(value):
+    # Booleans use the same '1'/'0' the admin puts in its filter query strings
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    return '' if value is None else str(value)
+
+
+def _loaded_values(instance):
+    # Read from __dict__ so deferred fields are never fetched just for this
+    return {
+        field: facet_value(instance.__dict__[field])
+        for field in FACET_FIELDS if field in instance.__dict__
+    }
+
+
+def apply_deltas(deltas):
+    """
+    Add {(field, value): delta} to the facet counts
+    """
+    for (field, value), delta in deltas.items():
+        if not delta:
+            continue
+        updated = HostFacet.objects.filter(field=field, value=value).update(count=F('count') + delta)
+        if updated:
+            continue
+        try:
+            with transaction.atomic():
+                HostFacet.objects.create(field=field, value=value, count=delta)
+        except IntegrityError:
+            HostFacet.objects.filter(field=field, value=value).update(count=F('count') + delta)
+
+
+def record_created(hosts):
+    """
+    Count hosts inserted without post_save (bulk_create)
+    """
+    deltas = Counter()
+    for host in hosts:
+        deltas[TOTAL] += 1
+        for field, value in _loaded_values(host).items():
+            deltas[(field, value)] += 1
+    apply_deltas(deltas)
+
+
+def facet_update(queryset, field, value, update=None):
+    """
+    Run a bulk update of one facet field and move the affected counts, in
+    one transaction. `update` performs the UPDATE (defaults to queryset.update).
+    """
+    new_value = facet_value(value)
+    with transaction.atomic():
+        before = queryset.values(field).annotate(n=Count('pk')).order_by()
+        deltas = Counter()
+        for row in before:
+            old_value = facet_value(row[field])
+            if old_value != new_value:
+                deltas[(field, old_value)] -= row['n']
+                deltas[(field, new_value)] += row['n']
+        updated = update() if update else queryset.update(**{field: value})
+        apply_deltas(deltas)
+    return updated
+
+
+def rebuild():
+    """
+    Recompute every facet from the host table (initial load, drift repair)
+    """
+    with transaction.atomic():
+        HostFacet.objects.all().delete()
+        rows = [HostFacet(field=TOTAL[0], value=TOTAL[1], count=CustomHost.objects.count())]
+        for field in FACET_FIELDS:
+            for row in CustomHost.objects.values(field).annotate(n=Count('pk')).order_by():
+                rows.append(HostFacet(field=field, value=facet_value(row[field]), count=row['n']))
+        HostFacet.objects.bulk_create(rows)
+
+
+def approximate_count(filters):
+    """
+    Host count for no filter or a single facet filter, from the facet table;
+    None when the facets cannot answer
+    """
+    if not filters:
+        field, value = TOTAL
+    elif len(filters) == 1:
+        (field, value), = filters.items()
+        if field not in FACET_FIELDS:
+            return None
+    else:
+        return None
+    facet = HostFacet.objects.filter(field=field, value=value).values_list('count', flat=True).first()
+    return facet or 0
+
+
+def _snapshot(sender, instance, **kwargs):
+    instance._facet_snapshot = _loaded_values(instance)
+
+
+def _host_saved(sender, instance, created, **kwargs):
+    current = _loaded_values(instance)
+    deltas = Counter()
+    if created:
+        deltas[TOTAL] += 1
+        for field, value in current.items():
+            deltas[(field, value)] += 1
+    else:
+        previous = getattr(instance, '_facet_snapshot', {})
+        for field, value in current.items():
+            if field in previous and previous[field] != value:
+                deltas[(field, previous[field])] -= 1
+                deltas[(field, value)] += 1
+    apply_deltas(deltas)
+    instance._facet_snapshot = current
+
+
+def _host_deleted(sender, instance, **kwargs):
+    deltas = Counter({TOTAL: -1})
+    for field, value in getattr(instance, '_facet_snapshot', _loaded_values(instance)).items():
+        deltas[(field, value)] -= 1
+    apply_deltas(deltas)
+
+
+def connect():
+    post_init.connect(_snapshot, sender=CustomHost, dispatch_uid='host_facets_snapshot')
+    post_save.connect(_host_saved, sender=CustomHost, dispatch_uid='host_facets_saved')
+    post_delete.connect(_host_deleted, sender=CustomHost, dispatch_uid='host_facets_deleted')
@@ -0,0 +1,103 @@
+from operator import attrgetter, itemgetter
+
+from rest_framework import fields as drf_fields
+
+from .metrics import timed_phase
+
+# Fields whose to_representation() returns model values of the matching type
+# unchanged, so the value can be copied straight through
+PASSTHROUGH_FIELDS = {
+    drf_fields.CharField,
+    drf_fields.EmailField,
+    drf_fields.URLField,
+    drf_fields.SlugField,
+    drf_fields.ChoiceField,
+    drf_fields.IntegerField,
+    drf_fields.BooleanField,
+}
+
+
+def compile_fields(serializer_class):
+    """
+    Turn a serializer's readable fields into (name, attr getter, item getter,
+    converter) tuples; converter is None for pass-through fields
+    """
+    # Keep the serializer alive: converters are bound methods of its fields
+    serializer = serializer_class()
+    compiled = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == '*' or '.' in field.source:
+            raise ValueError(f'{serializer_class.__name__}.{name} is not a plain model column')
+        convert = None if type(field) in PASSTHROUGH_FIELDS else field.to_representation
+        compiled.append((name, attrgetter(field.source), itemgetter(field.source), convert, field.source))
+    return serializer, compiled
+
+
+class FastReadSerializer:
+    """
+    Read-only stand-in for a ModelSerializer's .data that skips DRF's
+    per-field machinery but produces identical output. Subclasses set
+    `serializer_class` to the serializer being mirrored.
+    """
+    serializer_class = None
+
+    def __init__(self, instance=None, many=False):
+        self.instance = instance
+        self.many = many
+
+    @classmethod
+    def compiled(cls):
+        if '_compiled' not in cls.__dict__:
+            cls._serializer, cls._compiled = compile_fields(cls.serializer_class)
+        return cls._compiled
+
+    @classmethod
+    def columns(cls):
+        return [source for _, _, _, _, source in cls.compiled()]
+
+    @classmethod
+    def represent(cls, instance):
+        ret = {}
+        for name, get_attr, _, convert, _ in cls.compiled():
+            value = get_attr(instance)
+            ret[name] = value if value is None or convert is None else convert(value)
+        return ret
+
+    @classmethod
+    def represent_row(cls, row):
+        ret = {}
+        for name, _, get_item, convert, _ in cls.compiled():
+            value = get_item(row)
+            ret[name] = value if value is None or convert is None else convert(value)
+        return ret
+
+    @property
+    def data(self):
+        with timed_phase('serializer'):
+            if self.many:
+                return [self.represent(instance) for instance in self.instance]
+            return self.represent(self.instance)
+
+    @classmethod
+    def only(cls, queryset):
+        """
+        Restrict a queryset to the columns this serializer reads
+        """
+        return queryset.only(*cls.columns())
+
+    @classmethod
+    def from_queryset(cls, queryset):
+        """
+        Serialize straight from .values() rows without building model instances
+        """
+        return list(cls.iter_queryset(queryset))
+
+    @classmethod
+    def iter_queryset(cls, queryset, chunk_size=2000):
+        """
+        Lazily serialize .values() rows, fetching chunk_size rows at a time
+        """
+        for row in queryset.values(*cls.columns()).iterator(chunk_size=chunk_size):
+            yield cls.represent_row(row)
@@ -0,0 +1,154 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from .metrics import record_phase
+
+
+class HashingPoolFull(Exception):
+    """
+    Raised when the hashing queue is at capacity; callers should shed load
+    (503) rather than wait.
+    """
+
+
+def _timed_call(fn, args):
+    # Runs in the worker; monotonic clocks are comparable across processes on
+    # Linux, so the caller can derive queue wait time from the start stamp.
+    return time.monotonic(), fn(*args)
+
+
+def _check_or_dummy(password, encoded):
+    if encoded is None:
+        # Hash anyway so unknown emails take as long as wrong passwords
+        hashers.make_password(password)
+        return False
+    return hashers.check_password(password, encoded)
+
+
+class HashingPool:
+    """
+    Bounded executor for password hashing so PBKDF2 never runs on the event
+    loop or on the single thread used by sync_to_async.
+    """
+
+    def __init__(self, kind='thread', max_workers=4, max_queue=64):
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == 'process':
+                        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.max_workers, thread_name_prefix='hashing'
+                        )
+        return self._executor
+
+    def _acquire(self, count=1):
+        with self._lock:
+            if self.in_flight + count > self.max_workers + self.max_queue:
+                self.rejected += count
+                raise HashingPoolFull()
+            self.in_flight += count
+
+    def _release(self, count, submitted, started_stamps):
+        with self._lock:
+            self.in_flight -= count
+            for started in started_stamps:
+                wait = max(0.0, started - submitted)
+                self.completed += 1
+                self.wait_total += wait
+                if wait > self.wait_max:
+                    self.wait_max = wait
+
+    async def run(self, fn, *args):
+        self._acquire()
+        submitted = time.monotonic()
+        started = submitted
+        loop = asyncio.get_running_loop()
+        try:
+            started, result = await loop.run_in_executor(
+                self._get_executor(), _timed_call, fn, args
+            )
+        finally:
+            self._release(1, submitted, [started])
+        # Executor threads do not inherit the request context, so the hash
+        # time is charged to the request here rather than by the hasher
+        record_phase('password_hash', time.monotonic() - started)
+        return result
+
+    def map(self, fn, items):
+        """
+        Run fn over items in parallel from sync code, preserving order
+        """
+        items = list(items)
+        self._acquire(len(items))
+        submitted = time.monotonic()
+        stamps = []
+        results = []
+        chunksize = max(1, len(items) // (self.max_workers * 4))
+        try:
+            for started, result in self._get_executor().map(
+                _timed_call, repeat(fn, len(items)), [(item,) for item in items],
+                chunksize=chunksize
+            ):
+                stamps.append(started)
+                results.append(result)
+        finally:
+            self._release(len(items), submitted, stamps)
+        record_phase('password_hash', time.monotonic() - submitted)
+        return results
+
+    def make_passwords(self, passwords):
+        return self.map(hashers.make_password, passwords)
+
+    async def make_password(self, password):
+        return await self.run(hashers.make_password, password)
+
+    async def check_password(self, password, encoded):
+        return await self.run(_check_or_dummy, password, encoded)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'kind': self.kind,
+                'max_workers': self.max_workers,
+                'in_flight': self.in_flight,
+                'queue_depth': max(0, self.in_flight - self.max_workers),
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'wait_avg': self.wait_total / self.completed if self.completed else 0.0,
+                'wait_max': self.wait_max,
+            }
+
+
+def _build_pool(setting, kind='thread', max_queue=64):
+    options = getattr(settings, setting, {})
+    return HashingPool(
+        kind=options.get('KIND', kind),
+        max_workers=options.get('MAX_WORKERS', 4),
+        max_queue=options.get('MAX_QUEUE', max_queue),
+    )
+
+
+hashing_pool = _build_pool('PASSWORD_HASHING_POOL')
+# Separate pool for batch onboarding/imports so a large batch cannot fill the
+# queue that interactive logins depend on
+bulk_hashing_pool = _build_pool('BULK_PASSWORD_HASHING_POOL', kind='process', max_queue=1000)
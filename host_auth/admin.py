@@ -1,3 +1,250 @@
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import EmptyPage, InvalidPage, PageNotAnInteger, Paginator
+from django.utils.functional import cached_property
+from django.urls import reverse
+from django.utils.html import format_html
+from origon import facets, jobs, search
+from .models import CustomHost, HostBulkJob, HostFacet
 
-# Register your models here.
+
+class FacetListFilter(admin.SimpleListFilter):
+    """
+    List filter whose choices and counts come from HostFacet instead of a
+    SELECT DISTINCT over the host table
+    """
+    def lookups(self, request, model_admin):
+        rows = HostFacet.objects.filter(field=self.parameter_name, count__gt=0).exclude(value='')
+        return [(row.value, f'{row.value} (~{row.count})') for row in rows.order_by('value')]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.parameter_name: self.value()})
+
+
+class CityFacetFilter(FacetListFilter):
+    title = 'city'
+    parameter_name = 'city'
+
+
+class CountryFacetFilter(FacetListFilter):
+    title = 'country'
+    parameter_name = 'country'
+
+
+# Changelist query parameters the facet table can count on its own
+FACET_PARAMS = {
+    'city': 'city',
+    'country': 'country',
+    'business_type__exact': 'business_type',
+    'is_verified__exact': 'is_verified',
+    'is_active__exact': 'is_active',
+}
+
+
+class FacetPaginator(Paginator):
+    """
+    Paginator that finds its page bounds without counting: each page fetches
+    one row past its end to learn whether another page follows. The total
+    shown comes from HostFacet when the changelist is unfiltered or filtered
+    on a single facet (approximate_count), and is never used for bounds.
+    """
+    def __init__(self, object_list, per_page, filters=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.filters = filters
+        # Pages known to exist: up to the last one fetched, plus one if it
+        # had more rows
+        self.num_pages = 1
+
+    @cached_property
+    def approximate_count(self):
+        if self.filters is None:
+            return None
+        return facets.approximate_count(self.filters)
+
+    def validate_number(self, number):
+        # No upper bound yet: page() finds out whether the page exists
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and (number > 1 or not self.allow_empty_first_page):
+            raise EmptyPage(self.error_messages['no_results'])
+        self.num_pages = number + 1 if len(rows) > self.per_page else number
+        return self._get_page(rows[:self.per_page], number, self)
+
+
+class FacetChangeList(ChangeList):
+    """
+    Changelist that pages with FacetPaginator and so never runs a full
+    COUNT(*) when HostFacet can give the total
+    """
+    def get_results(self, request):
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        # "Show all" is decided on a count capped at the limit
+        capped = self.queryset.order_by()[:self.list_max_show_all + 1].count()
+        can_show_all = capped <= self.list_max_show_all
+        if self.show_all and can_show_all:
+            result_list = self.queryset._clone()
+            multi_page = capped > self.list_per_page
+            result_count = capped
+        else:
+            try:
+                page = paginator.page(self.page_num)
+            except InvalidPage:
+                raise IncorrectLookupParameters
+            result_list = page.object_list
+            multi_page = paginator.num_pages > 1
+            # Rows up to the end of this page are known to exist
+            seen = (page.number - 1) * self.list_per_page + len(result_list)
+            if not page.has_next():
+                result_count = seen
+            elif paginator.approximate_count is not None:
+                result_count = max(paginator.approximate_count, seen + 1)
+            else:
+                result_count = paginator.count
+
+        self.result_count = result_count
+        self.show_full_result_count = self.model_admin.show_full_result_count
+        self.show_admin_actions = not self.show_full_result_count or bool(result_count)
+        self.full_result_count = self.root_queryset.count() if self.show_full_result_count else None
+        self.result_list = result_list
+        self.can_show_all = can_show_all
+        self.multi_page = multi_page
+        self.paginator = paginator
+
+
+@admin.register(CustomHost)
+class CustomHostAdmin(admin.ModelAdmin):
+    """
+    Custom admin interface for CustomHost model
+    """
+    list_display = (
+        'email', 'full_name', 'business_name', 'business_type', 
+        'is_verified', 'is_active', 'date_joined'
+    )
+    list_filter = (
+        'business_type', 'is_verified', 'is_active', 'date_joined', CityFacetFilter, CountryFacetFilter
+    )
+    search_fields = ('email', 'full_name', 'business_name', 'phone_number', 'city')
+    readonly_fields = ('date_joined', 'last_login')
+    # The unfiltered total comes from the facet table via get_paginator
+    show_full_result_count = False
+    
+    fieldsets = (
+        (None, {
+            'fields': ('username', 'email', 'password')
+        }),
+        ('Personal Info', {
+            'fields': ('full_name', 'phone_number')
+        }),
+        ('Business Info', {
+            'fields': ('business_name', 'business_license', 'business_type', 'bio')
+        }),
+        ('Address', {
+            'fields': ('address', 'city', 'state', 'country', 'postal_code')
+        }),
+        ('Verification', {
+            'fields': ('is_verified', 'verification_documents')
+        }),
+        ('Permissions', {
+            'fields': ('is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions')
+        }),
+        ('Important dates', {
+            'fields': ('last_login', 'date_joined')
+        }),
+        ('Additional', {
+            'fields': ('profile_image',)
+        }),
+    )
+    
+    add_fieldsets = (
+        (None, {
+            'classes': ('wide',),
+            'fields': ('username', 'email', 'full_name', 'phone_number', 'password1', 'password2'),
+        }),
+    )
+    
+    actions = ['verify_hosts', 'unverify_hosts']
+
+    def facet_filters(self, request):
+        # None when the query uses anything the facet table cannot answer
+        filters = {}
+        for param, value in request.GET.items():
+            if param in ('o', 'p'):
+                continue
+            if param not in FACET_PARAMS:
+                return None
+            filters[FACET_PARAMS[param]] = value
+        return filters
+
+    def get_search_results(self, request, queryset, search_term):
+        # Served by the host FTS index rather than OR'd LIKE '%term%' scans
+        if not search_term:
+            return queryset, False
+        return search.filter_hosts(queryset, search_term), False
+
+    def get_changelist(self, request, **kwargs):
+        return FacetChangeList
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return FacetPaginator(
+            queryset, per_page, filters=self.facet_filters(request),
+            orphans=orphans, allow_empty_first_page=allow_empty_first_page
+        )
+    
+    def verify_hosts(self, request, queryset):
+        self.run_bulk_action(request, 'verify', queryset, 'verified')
+    verify_hosts.short_description = "Mark selected hosts as verified"
+
+    def unverify_hosts(self, request, queryset):
+        self.run_bulk_action(request, 'unverify', queryset, 'marked as unverified')
+    unverify_hosts.short_description = "Mark selected hosts as unverified"
+
+    def run_bulk_action(self, request, action, queryset, done):
+        # Large selections run as chunked background jobs so the write lock
+        # is never held for the whole selection
+        changed, job = jobs.run_action(action, queryset, requested_by=request.user.get_username())
+        if job is None:
+            self.message_user(request, f'{changed} hosts were successfully {done}.')
+            return
+        url = reverse('admin:host_auth_hostbulkjob_change', args=[job.pk])
+        self.message_user(request, format_html(
+            '{} hosts will be {} in the background; <a href="{}">follow job #{}</a>.',
+            job.total, done, url, job.pk
+        ))
+
+
+@admin.register(HostBulkJob)
+class HostBulkJobAdmin(admin.ModelAdmin):
+    """
+    Progress of background host bulk actions
+    """
+    list_display = ('id', 'action', 'status', 'progress_display', 'changed', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('action', 'status')
+    readonly_fields = (
+        'action', 'status', 'progress_display', 'total', 'processed', 'changed', 'last_pk',
+        'error', 'requested_by', 'created_at', 'updated_at', 'finished_at'
+    )
+    exclude = ('host_ids',)
+
+    def progress_display(self, obj):
+        return f'{obj.progress}% ({obj.processed}/{obj.total})'
+    progress_display.short_description = 'Progress'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -4,3 +4,21 @@ from django.apps import AppConfig
 class HostAuthConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'host_auth'
+    verbose_name = 'Host Authentication'
+
+    def ready(self):
+        from django.conf import settings
+
+        # Without it, the common-password list and email_validator load in
+        # the first signup/login instead
+        if getattr(settings, 'PRELOAD_AUTH_DEPENDENCIES', True):
+            from origon.email_normalization import preload_email_validator
+            from origon.password_validation import preload_password_validators
+            preload_email_validator()
+            preload_password_validators()
+
+        from origon import facets
+        facets.connect()
+
+        from origon import metrics
+        metrics.install()
@@ -0,0 +1,70 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from origon import search
+from origon.models import CustomHost
+
+PREFIX = 'bench-search-'
+FIRST_NAMES = ['Ada', 'Bola', 'Chidi', 'Dayo', 'Emeka', 'Funmi', 'Gbenga', 'Halima', 'Ifeoma', 'Jide']
+LAST_NAMES = ['Okafor', 'Adeyemi', 'Bello', 'Eze', 'Ibrahim', 'Nwosu', 'Ogunleye', 'Usman', 'Yusuf', 'Obi']
+BUSINESS_WORDS = ['Homes', 'Suites', 'Apartments', 'Lodge', 'Residences', 'Realty', 'Stays', 'Villas']
+CITIES = ['Lagos', 'Abuja', 'Ibadan', 'Kano', 'Enugu', 'Port Harcourt', 'Benin City', 'Jos', 'Calabar']
+TERMS = ['okafor', 'ada eze', 'lagos suites', 'funm', 'host42', '0803', 'calabar villas', 'zzzz']
+
+
+class Command(BaseCommand):
+    help = 'Compare LIKE search against the host FTS index on a synthetic host table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic hosts afterwards')
+
+    def handle(self, *args, **options):
+        queryset = CustomHost.objects.filter(username__startswith=PREFIX)
+        existing = queryset.count()
+        if existing < options['rows']:
+            self.seed(existing, options['rows'])
+
+        hosts = CustomHost.objects.all()
+        try:
+            for term in TERMS:
+                like = self.measure(options['repeat'], lambda: list(
+                    hosts.filter(search._like_filter(term)).order_by('-id').values_list('id', flat=True)[:20]
+                ))
+                like_count = self.measure(options['repeat'], lambda: hosts.filter(search._like_filter(term)).count())
+                fts = self.measure(options['repeat'], lambda: list(search.search_hosts(term, 20)))
+                fts_count = self.measure(options['repeat'], lambda: search.filter_hosts(hosts, term).count())
+                self.stdout.write(
+                    f'{term!r:>18}: top 20 LIKE {like * 1000:8.2f} ms, FTS {fts * 1000:8.2f} ms | '
+                    f'count LIKE {like_count * 1000:8.2f} ms, FTS {fts_count * 1000:8.2f} ms'
+                )
+        finally:
+            if not options['keep']:
+                queryset.delete()
+
+    def measure(self, repeat, fn):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def seed(self, start, rows, batch_size=5000):
+        self.stdout.write(f'Seeding {rows - start} hosts...')
+        rng = random.Random(start)
+        for offset in range(start, rows, batch_size):
+            batch = []
+            for i in range(offset, min(offset + batch_size, rows)):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                batch.append(CustomHost(
+                    username=f'{PREFIX}{i}', email=f'{first.lower()}.{last.lower()}.host{i}@example.com',
+                    full_name=f'{first} {last}', phone_number=f'080{rng.randrange(10 ** 8):08d}',
+                    business_name=f'{last} {rng.choice(BUSINESS_WORDS)}', city=rng.choice(CITIES),
+                    password='!'
+                ))
+            CustomHost.objects.bulk_create(batch)
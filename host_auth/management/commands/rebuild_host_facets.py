@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from origon import facets
+from origon.models import HostFacet
+
+
+class Command(BaseCommand):
+    help = 'Recompute the host admin facet counts from the host table'
+
+    def handle(self, *args, **options):
+        facets.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {HostFacet.objects.count()} facet rows'))
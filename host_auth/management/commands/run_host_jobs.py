@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from origon.jobs import resume_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run pending host bulk jobs and resume ones left unfinished by a stopped worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-after', type=int, default=300,
+            help='Seconds without progress before a running job is taken over'
+        )
+
+    def handle(self, *args, **options):
+        job_pks = resume_jobs(timedelta(seconds=options['stale_after']))
+        self.stdout.write(self.style.SUCCESS(f'Checked {len(job_pks)} jobs'))
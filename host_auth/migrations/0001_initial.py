@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:47
+
+import django.contrib.auth.models
+import django.contrib.auth.validators
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomHost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('password', models.CharField(max_length=128, verbose_name='password')),
+                ('last_login', models.DateTimeField(blank=True, null=True, verbose_name='last login')),
+                ('is_superuser', models.BooleanField(default=False, help_text='Designates that this user has all permissions without explicitly assigning them.', verbose_name='superuser status')),
+                ('username', models.CharField(error_messages={'unique': 'A user with that username already exists.'}, help_text='Required. 150 characters or fewer. Letters, digits and @/./+/-/_ only.', max_length=150, unique=True, validators=[django.contrib.auth.validators.UnicodeUsernameValidator()], verbose_name='username')),
+                ('first_name', models.CharField(blank=True, max_length=150, verbose_name='first name')),
+                ('last_name', models.CharField(blank=True, max_length=150, verbose_name='last name')),
+                ('is_staff', models.BooleanField(default=False, help_text='Designates whether the user can log into this admin site.', verbose_name='staff status')),
+                ('is_active', models.BooleanField(default=True, help_text='Designates whether this user should be treated as active. Unselect this instead of deleting accounts.', verbose_name='active')),
+                ('date_joined', models.DateTimeField(default=django.utils.timezone.now, verbose_name='date joined')),
+                ('business_name', models.CharField(blank=True, max_length=255)),
+                ('business_license', models.CharField(blank=True, help_text='Business license number', max_length=100)),
+                ('business_type', models.CharField(choices=[('individual', 'Individual'), ('company', 'Company'), ('agency', 'Real Estate Agency')], default='individual', max_length=50)),
+                ('full_name', models.CharField(max_length=255)),
+                ('phone_number', models.CharField(max_length=15)),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('address', models.TextField(blank=True)),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('state', models.CharField(blank=True, max_length=100)),
+                ('country', models.CharField(blank=True, max_length=100)),
+                ('postal_code', models.CharField(blank=True, max_length=20)),
+                ('is_verified', models.BooleanField(default=False, help_text='Whether the host is verified by admin')),
+                ('verification_documents', models.TextField(blank=True, help_text='Notes about verification documents')),
+                ('bio', models.TextField(blank=True, help_text='Host description/bio')),
+                ('profile_image', models.URLField(blank=True, help_text='URL to profile image')),
+                ('groups', models.ManyToManyField(blank=True, related_name='host_set', related_query_name='host', to='auth.group', verbose_name='groups')),
+                ('user_permissions', models.ManyToManyField(blank=True, related_name='host_set', related_query_name='host', to='auth.permission', verbose_name='user permissions')),
+            ],
+            options={
+                'verbose_name': 'Host',
+                'verbose_name_plural': 'Hosts',
+                'db_table': 'host_auth_customhost',
+            },
+            managers=[
+                ('objects', django.contrib.auth.models.UserManager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('host_auth', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customhost',
+            name='version',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
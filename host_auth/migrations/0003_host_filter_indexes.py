@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:49
+
+from django.db import migrations, models
+
+
+class AddIndexOnline(migrations.AddIndex):
+    """
+    CREATE INDEX CONCURRENTLY on PostgreSQL so large host tables stay
+    writable; a plain CREATE INDEX elsewhere (SQLite has no online build)
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+
+class Migration(migrations.Migration):
+
+    # Each index builds in its own transaction, so write locks are only held
+    # for one index at a time (and CONCURRENTLY needs to run outside one)
+    atomic = False
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('host_auth', '0002_version'),
+    ]
+
+    operations = [
+        AddIndexOnline(
+            model_name='customhost',
+            index=models.Index(fields=['business_type'], name='host_business_type_idx'),
+        ),
+        AddIndexOnline(
+            model_name='customhost',
+            index=models.Index(condition=models.Q(('is_verified', False)), fields=['id'], name='host_unverified_idx'),
+        ),
+        AddIndexOnline(
+            model_name='customhost',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_verified', True)), fields=['id'], name='host_verified_active_idx'),
+        ),
+        AddIndexOnline(
+            model_name='customhost',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['id'], name='host_inactive_idx'),
+        ),
+        AddIndexOnline(
+            model_name='customhost',
+            index=models.Index(fields=['city'], name='host_city_idx'),
+        ),
+        AddIndexOnline(
+            model_name='customhost',
+            index=models.Index(fields=['country'], name='host_country_idx'),
+        ),
+        AddIndexOnline(
+            model_name='customhost',
+            index=models.Index(fields=['date_joined'], name='host_date_joined_idx'),
+        ),
+    ]
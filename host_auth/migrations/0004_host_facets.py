@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:51
+
+from django.db import migrations, models
+from django.db.models import Count
+
+FACET_FIELDS = ('city', 'country', 'business_type', 'is_verified', 'is_active')
+
+
+def facet_value(value):
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    return '' if value is None else str(value)
+
+
+def populate_facets(apps, schema_editor):
+    CustomHost = apps.get_model('host_auth', 'CustomHost')
+    HostFacet = apps.get_model('host_auth', 'HostFacet')
+    rows = [HostFacet(field='__all__', value='', count=CustomHost.objects.count())]
+    for field in FACET_FIELDS:
+        for row in CustomHost.objects.values(field).annotate(n=Count('pk')).order_by():
+            rows.append(HostFacet(field=field, value=facet_value(row[field]), count=row['n']))
+    HostFacet.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('host_auth', '0003_host_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HostFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=50)),
+                ('value', models.CharField(blank=True, max_length=255)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'host_auth_hostfacet',
+                'constraints': [models.UniqueConstraint(fields=('field', 'value'), name='host_facet_field_value_uniq')],
+            },
+        ),
+        migrations.RunPython(populate_facets, migrations.RunPython.noop),
+    ]
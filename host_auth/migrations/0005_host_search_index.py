@@ -0,0 +1,66 @@
+from django.db import migrations
+
+COLUMNS = 'email, full_name, business_name, phone_number, city'
+OLD = 'old.email, old.full_name, old.business_name, old.phone_number, old.city'
+NEW = 'new.email, new.full_name, new.business_name, new.phone_number, new.city'
+
+# External-content FTS5 index over the admin search columns. Triggers keep it
+# in step with every write, including queryset.update() and bulk_create().
+# Prefix indexes make "term*" lookups of 2-4 characters index-only.
+CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE host_auth_customhost_fts USING fts5(
+        {COLUMNS},
+        content='host_auth_customhost', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+    )
+    """,
+    f"""
+    CREATE TRIGGER host_auth_customhost_fts_ai AFTER INSERT ON host_auth_customhost BEGIN
+        INSERT INTO host_auth_customhost_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW});
+    END
+    """,
+    f"""
+    CREATE TRIGGER host_auth_customhost_fts_ad AFTER DELETE ON host_auth_customhost BEGIN
+        INSERT INTO host_auth_customhost_fts(host_auth_customhost_fts, rowid, {COLUMNS})
+        VALUES ('delete', old.id, {OLD});
+    END
+    """,
+    # Only the indexed columns fire this, so last_login/version writes do not
+    # touch the index
+    f"""
+    CREATE TRIGGER host_auth_customhost_fts_au AFTER UPDATE OF {COLUMNS} ON host_auth_customhost BEGIN
+        INSERT INTO host_auth_customhost_fts(host_auth_customhost_fts, rowid, {COLUMNS})
+        VALUES ('delete', old.id, {OLD});
+        INSERT INTO host_auth_customhost_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW});
+    END
+    """,
+    "INSERT INTO host_auth_customhost_fts(host_auth_customhost_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS host_auth_customhost_fts_au',
+    'DROP TRIGGER IF EXISTS host_auth_customhost_fts_ad',
+    'DROP TRIGGER IF EXISTS host_auth_customhost_fts_ai',
+    'DROP TABLE IF EXISTS host_auth_customhost_fts',
+]
+
+
+def run_on_sqlite(statements):
+    # Other databases keep the LIKE search (see origon/search.py)
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            for statement in statements:
+                schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('host_auth', '0004_host_facets'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_SQL), run_on_sqlite(DROP_SQL)),
+    ]
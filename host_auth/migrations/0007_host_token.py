@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('host_auth', '0006_host_bulk_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HostToken',
+            fields=[
+                ('key', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='auth_token', to='host_auth.customhost')),
+            ],
+            options={
+                'db_table': 'host_auth_hosttoken',
+                'indexes': [models.Index(fields=['created'], name='host_token_created_idx')],
+            },
+        ),
+    ]
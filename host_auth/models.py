@@ -1,3 +1,172 @@
 from django.db import models
+from django.contrib.auth.models import AbstractUser
+from rest_framework.authtoken.models import Token
+from origon.versioning import VersionedModel
 
-# Create your models here.
+
+class CustomHost(AbstractUser, VersionedModel):
+    """
+    Custom host model for property owners/managers
+    """
+    # Business information
+    business_name = models.CharField(max_length=255, blank=True)
+    business_license = models.CharField(max_length=100, blank=True, help_text="Business license number")
+    business_type = models.CharField(max_length=50, choices=[
+        ('individual', 'Individual'),
+        ('company', 'Company'),
+        ('agency', 'Real Estate Agency'),
+    ], default='individual')
+    
+    # Contact information
+    full_name = models.CharField(max_length=255)
+    phone_number = models.CharField(max_length=15)
+    email = models.EmailField(unique=True)
+    
+    # Address information
+    address = models.TextField(blank=True)
+    city = models.CharField(max_length=100, blank=True)
+    state = models.CharField(max_length=100, blank=True)
+    country = models.CharField(max_length=100, blank=True)
+    postal_code = models.CharField(max_length=20, blank=True)
+    
+    # Verification status
+    is_verified = models.BooleanField(default=False, help_text="Whether the host is verified by admin")
+    verification_documents = models.TextField(blank=True, help_text="Notes about verification documents")
+    
+    # Additional info
+    bio = models.TextField(blank=True, help_text="Host description/bio")
+    profile_image = models.URLField(blank=True, help_text="URL to profile image")
+    
+    # Own reverse accessors, so they don't clash with CustomUser's
+    groups = models.ManyToManyField(
+        'auth.Group', verbose_name='groups', blank=True, related_name='host_set', related_query_name='host'
+    )
+    user_permissions = models.ManyToManyField(
+        'auth.Permission', verbose_name='user permissions', blank=True,
+        related_name='host_set', related_query_name='host'
+    )
+
+    # Use email as the unique identifier for authentication
+    USERNAME_FIELD = 'email'
+    REQUIRED_FIELDS = ['username', 'full_name', 'phone_number']
+    
+    class Meta:
+        db_table = 'host_auth_customhost'
+        verbose_name = 'Host'
+        verbose_name_plural = 'Hosts'
+        # Admin list_filter columns and the verified/active checks. Booleans
+        # get partial indexes on their selective states: SQLite compares them
+        # as bare "WHERE is_verified", which a plain column index cannot serve.
+        indexes = [
+            models.Index(fields=['business_type'], name='host_business_type_idx'),
+            models.Index(fields=['id'], condition=models.Q(is_verified=False), name='host_unverified_idx'),
+            models.Index(
+                fields=['id'], condition=models.Q(is_verified=True, is_active=True), name='host_verified_active_idx'
+            ),
+            models.Index(fields=['id'], condition=models.Q(is_active=False), name='host_inactive_idx'),
+            models.Index(fields=['city'], name='host_city_idx'),
+            models.Index(fields=['country'], name='host_country_idx'),
+            models.Index(fields=['date_joined'], name='host_date_joined_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.business_name or self.full_name} ({self.email})"
+    
+    def get_full_name(self):
+        return self.full_name
+    
+    def get_business_display_name(self):
+        return self.business_name or self.full_name
+
+class HostToken(models.Model):
+    """
+    Database-mode auth token for a host. DRF's Token can only point at
+    AUTH_USER_MODEL, so hosts get a table of the same shape.
+    """
+    key = models.CharField(max_length=40, primary_key=True)
+    user = models.OneToOneField(CustomHost, related_name='auth_token', on_delete=models.CASCADE)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'host_auth_hosttoken'
+        # Token expiry checks and the sweep_tokens command filter on created
+        indexes = [
+            models.Index(fields=['created'], name='host_token_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self.key:
+            self.key = self.generate_key()
+        return super().save(*args, **kwargs)
+
+    @classmethod
+    def generate_key(cls):
+        return Token.generate_key()
+
+    def __str__(self):
+        return self.key
+
+
+class HostFacet(models.Model):
+    """
+    Running count of hosts per value of an admin filter field, kept current by
+    signals (see facets.py) so the changelist avoids DISTINCT and COUNT(*) scans
+    """
+    field = models.CharField(max_length=50)
+    value = models.CharField(max_length=255, blank=True)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'host_auth_hostfacet'
+        constraints = [
+            models.UniqueConstraint(fields=['field', 'value'], name='host_facet_field_value_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.field}={self.value} ({self.count})"
+
+
+class HostBulkJob(models.Model):
+    """
+    Admin bulk action on hosts run in chunks outside the request (see jobs.py)
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    action = models.CharField(max_length=20, choices=[
+        ('verify', 'Verify hosts'),
+        ('unverify', 'Unverify hosts'),
+    ])
+    status = models.CharField(max_length=20, choices=[
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ], default=PENDING)
+    # Selected host ids, in pk order, so a restarted worker can resume
+    host_ids = models.JSONField(default=list, editable=False)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    changed = models.PositiveIntegerField(default=0)
+    # Keyset position: every host with a lower pk has been handled
+    last_pk = models.BigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    requested_by = models.CharField(max_length=150, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'host_auth_hostbulkjob'
+        ordering = ['-id']
+
+    def __str__(self):
+        return f"{self.get_action_display()} #{self.pk} ({self.status})"
+
+    @property
+    def progress(self):
+        if not self.total:
+            return 100 if self.status == self.DONE else 0
+        return min(100, self.processed * 100 // self.total)
@@ -0,0 +1,20 @@
+from django.urls import path
+from authentication.views import TokenRefreshAPIView
+from . import views
+
+app_name = 'host_auth'
+
+urlpatterns = [
+    path('api/register/', views.HostRegisterAPIView.as_view(), name='api_host_register'),
+    path('api/bulk-register/', views.HostBulkRegisterAPIView.as_view(), name='api_host_bulk_register'),
+    path('api/login/', views.HostLoginAPIView.as_view(), name='api_host_login'),
+    path('api/logout/', views.HostLogoutAPIView.as_view(), name='api_host_logout'),
+    path('api/profile/', views.HostProfileAPIView.as_view(), name='api_host_profile'),
+    path('api/change-password/', views.ChangeHostPasswordAPIView.as_view(), name='api_host_change_password'),
+    path('api/details/', views.host_detail_view, name='api_host_detail'),
+    path('api/verification-status/', views.host_verification_status, name='api_host_verification'),
+    path('api/export/', views.host_export_view, name='api_host_export'),
+    path('api/search/', views.host_search_view, name='api_host_search'),
+    path('api/rate-limit-stats/', views.auth_rate_limit_stats_view, name='api_auth_rate_limit_stats'),
+    path('api/token/refresh/', TokenRefreshAPIView.as_view(), name='api_host_token_refresh'),
+]
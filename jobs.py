@@ -0,0 +1,141 @@
+import bisect
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import facets
+from .models import CustomHost, HostBulkJob
+from .token_cache import token_cache
+from .versioning import versioned_update
+
+logger = logging.getLogger(__name__)
+
+# Field and value each job action writes
+ACTIONS = {
+    'verify': ('is_verified', True),
+    'unverify': ('is_verified', False),
+}
+
+# One worker: jobs write one after another rather than competing for the
+# database write lock with each other
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='host-jobs')
+
+
+def job_options():
+    options = getattr(settings, 'HOST_BULK_JOBS', {})
+    return options.get('CHUNK_SIZE', 500), options.get('PAUSE', 0.05)
+
+
+def apply_chunk(action, pks):
+    """
+    Apply an action to the given hosts in one transaction, moving facet counts
+    and version stamps with it; returns the number of rows changed
+    """
+    field, value = ACTIONS[action]
+    # Rows already in the target state are skipped, so they keep their version
+    queryset = CustomHost.objects.filter(pk__in=pks).exclude(**{field: value})
+    with transaction.atomic():
+        changed = facets.facet_update(
+            queryset, field, value, lambda: versioned_update(queryset, **{field: value})
+        )
+        # update() skips post_save, so cached auth records are dropped here,
+        # once the outermost transaction (run_job's, when there is one) commits
+        transaction.on_commit(lambda: token_cache.invalidate_users(CustomHost._meta.label_lower, pks))
+    return changed
+
+
+def run_action(action, queryset, requested_by=''):
+    """
+    Apply an action to a host selection: inline when it fits in one chunk,
+    otherwise as a background job. Returns (changed, job); exactly one is None.
+    """
+    chunk_size, _ = job_options()
+    pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:chunk_size + 1])
+    if len(pks) <= chunk_size:
+        return apply_chunk(action, pks), None
+    # The job keeps the selected ids rather than the query, so it acts on
+    # exactly what the admin selected even if hosts change before it runs
+    host_ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    job = HostBulkJob.objects.create(
+        action=action,
+        host_ids=host_ids,
+        total=len(host_ids),
+        requested_by=requested_by,
+    )
+    transaction.on_commit(lambda: _executor.submit(run_job, job.pk))
+    return None, job
+
+
+def claim(job_pk, stale_before=None):
+    """
+    Mark a job running if it is pending (or running but silent since
+    stale_before); False when another worker has it
+    """
+    claimable = Q(status=HostBulkJob.PENDING)
+    if stale_before is not None:
+        claimable |= Q(status=HostBulkJob.RUNNING, updated_at__lt=stale_before)
+    updated = HostBulkJob.objects.filter(claimable, pk=job_pk).update(
+        status=HostBulkJob.RUNNING, updated_at=timezone.now()
+    )
+    return bool(updated)
+
+
+def run_job(job_pk, stale_before=None):
+    """
+    Work through a job chunk by chunk, committing progress after each chunk
+    so it can be resumed from last_pk
+    """
+    try:
+        if not claim(job_pk, stale_before):
+            return
+        try:
+            # From the primary: a replica may not have the claim or the
+            # progress of an earlier run yet
+            job = HostBulkJob.objects.using('default').get(pk=job_pk)
+            chunk_size, pause = job_options()
+            host_ids = sorted(job.host_ids)
+            while True:
+                start = bisect.bisect_right(host_ids, job.last_pk)
+                pks = host_ids[start:start + chunk_size]
+                if not pks:
+                    break
+                with transaction.atomic():
+                    changed = apply_chunk(job.action, pks)
+                    job.processed += len(pks)
+                    job.changed += changed
+                    job.last_pk = pks[-1]
+                    job.save(update_fields=['processed', 'changed', 'last_pk', 'updated_at'])
+                if pause:
+                    time.sleep(pause)
+        except Exception as exc:
+            logger.exception('Host bulk job %s failed', job_pk)
+            HostBulkJob.objects.filter(pk=job_pk).update(
+                status=HostBulkJob.FAILED, error=repr(exc), finished_at=timezone.now()
+            )
+            return
+        HostBulkJob.objects.filter(pk=job_pk).update(
+            status=HostBulkJob.DONE, finished_at=timezone.now(), updated_at=timezone.now()
+        )
+    finally:
+        close_old_connections()
+
+
+def resume_jobs(stale_after=timedelta(minutes=5)):
+    """
+    Run pending jobs and jobs whose worker stopped reporting (process restart);
+    returns the ids that were picked up
+    """
+    stale_before = timezone.now() - stale_after
+    job_pks = list(
+        HostBulkJob.objects.filter(status__in=[HostBulkJob.PENDING, HostBulkJob.RUNNING])
+        .order_by('pk').values_list('pk', flat=True)
+    )
+    for job_pk in job_pks:
+        run_job(job_pk, stale_before)
+    return job_pks
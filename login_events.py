@@ -0,0 +1,172 @@
+import atexit
+import ipaddress
+import os
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+from .rate_limit import client_ip
+
+SUCCESS = 'success'
+FAILURE = 'failure'
+DISABLED = 'disabled'
+
+
+def login_event_options():
+    options = getattr(settings, 'LOGIN_EVENTS', {})
+    return {
+        'FLUSH_INTERVAL': options.get('FLUSH_INTERVAL', 5),
+        'BATCH_SIZE': options.get('BATCH_SIZE', 500),
+        'MAX_PENDING': options.get('MAX_PENDING', 50000),
+    }
+
+
+def _ip_or_none(value):
+    try:
+        return str(ipaddress.ip_address(value))
+    except ValueError:
+        return None
+
+
+class LoginEventBuffer:
+    """
+    Queues login audit rows and last_login timestamps in memory; a
+    background thread writes them in one transaction every flush_interval
+    seconds, or as soon as batch_size events are waiting. A crash loses at
+    most one interval's worth, and never more than max_pending events.
+    """
+
+    def __init__(self, flush_interval=5, batch_size=500, max_pending=50000):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._events = deque(maxlen=max_pending)
+        self._last_login = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.flushed = 0
+        self.dropped = 0
+
+    def record(self, account_type, email, ip, outcome, account=None):
+        now = timezone.now()
+        event = (account_type, account.pk if account is not None else None, str(email or '')[:254],
+                 _ip_or_none(ip), outcome, now)
+        with self._lock:
+            if len(self._events) == self.max_pending:
+                # The deque drops the oldest event to make room
+                self.dropped += 1
+            self._events.append(event)
+            if outcome == SUCCESS:
+                # Repeated logins before a flush collapse into one UPDATE row
+                account.last_login = now
+                self._last_login[(type(account), account.pk)] = now
+            due = len(self._events) >= self.batch_size
+        self._ensure_thread()
+        if due:
+            self._wake.set()
+
+    def _ensure_thread(self):
+        # Started on first use, and again in a forked worker, which does not
+        # inherit its parent's threads
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='login-events', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except DatabaseError:
+                pass
+
+    def flush(self):
+        from authentication.models import LoginEvent
+
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+            last_logins, self._last_login = self._last_login, {}
+        if not events and not last_logins:
+            return 0
+        by_model = {}
+        for (model, pk), when in last_logins.items():
+            by_model.setdefault(model, []).append((pk, when))
+        try:
+            with transaction.atomic():
+                LoginEvent.objects.bulk_create([
+                    LoginEvent(account_type=account_type, account_id=account_id, email=email, ip=ip,
+                               outcome=outcome, created_at=created_at)
+                    for account_type, account_id, email, ip, outcome, created_at in events
+                ], batch_size=self.batch_size)
+                for model, rows in by_model.items():
+                    for start in range(0, len(rows), 500):
+                        chunk = rows[start:start + 500]
+                        # last_login is unversioned, so a plain UPDATE is enough
+                        model.objects.filter(pk__in=[pk for pk, _ in chunk]).update(last_login=Case(
+                            *[When(pk=pk, then=Value(when)) for pk, when in chunk],
+                            output_field=DateTimeField(),
+                        ))
+        except DatabaseError:
+            # Put them back for the next flush, newest first if they no
+            # longer all fit
+            with self._lock:
+                room = self.max_pending - len(self._events)
+                kept = events[len(events) - room:] if room > 0 else []
+                self.dropped += len(events) - len(kept)
+                self._events.extendleft(reversed(kept))
+                for key, when in last_logins.items():
+                    self._last_login.setdefault(key, when)
+            raise
+        self.flushed += len(events)
+        return len(events)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': len(self._events),
+                'pending_last_login': len(self._last_login),
+                'flushed': self.flushed,
+                'dropped': self.dropped,
+            }
+
+
+def _build_buffer():
+    options = login_event_options()
+    return LoginEventBuffer(options['FLUSH_INTERVAL'], options['BATCH_SIZE'], options['MAX_PENDING'])
+
+
+login_events = _build_buffer()
+
+
+def record_login(account_type, request, outcome, account=None, data=None):
+    """
+    Queue an audit record for a login attempt (and the account's last_login
+    on success) without touching the database. The email is the account's,
+    or else the one submitted in data.
+    """
+    if account is not None:
+        email = account.email
+    else:
+        email = data.get('email') if isinstance(data, dict) else None
+    login_events.record(account_type, email, client_ip(request), outcome, account)
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        login_events.flush()
+    except Exception:
+        pass
@@ -0,0 +1,358 @@
+import contextvars
+import hmac
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+# Timing buckets: four per power of two from 1 µs to ~2 minutes, so any
+# value lands in a bucket within 19% of it. Prometheus gets the octave edges.
+TIME_BOUNDS = [2 ** (step / 4) / 1e6 for step in range(0, 109)]
+EXPORTED_TIME_BOUNDS = TIME_BOUNDS[::4]
+# Query-count buckets (upper bounds are inclusive, as in Prometheus)
+COUNT_BOUNDS = [0, 1, 2, 3, 4, 6, 8, 12, 16, 24, 32, 48, 64, 96, 128, 256, 512]
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class Histogram:
+    """
+    Fixed-size histogram over preset bucket bounds. ViewMetrics fills the
+    counts directly, under one lock for all of a view's histograms.
+    """
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def cumulative(self, exported_bounds):
+        """
+        (upper bound, cumulative count) pairs for exported_bounds, each of
+        which must be one of this histogram's bounds
+        """
+        result = []
+        running = 0
+        position = 0
+        for bound in exported_bounds:
+            index = self.bounds.index(bound, position)
+            running += sum(self.counts[position:index + 1])
+            position = index + 1
+            result.append((bound, running))
+        return result
+
+
+class RequestState:
+    # Per-request accumulator, filled by the DB wrapper and phase timers
+    __slots__ = ('queries', 'db_time', 'serializer', 'password_hash', 'active')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer = 0.0
+        self.password_hash = 0.0
+        self.active = None
+
+
+class ViewMetrics:
+    """
+    All histograms for one view, updated together under one lock. observe()
+    is inlined by hand: it runs on every request.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.duration = Histogram(TIME_BOUNDS)
+        self.queries = Histogram(COUNT_BOUNDS)
+        self.db_duration = Histogram(TIME_BOUNDS)
+        self.serializer = Histogram(TIME_BOUNDS)
+        self.password_hash = Histogram(TIME_BOUNDS)
+        self.responses = {}
+
+    def observe(self, elapsed, state, status_code):
+        queries = state.queries
+        db_time = state.db_time
+        serializer = state.serializer
+        password_hash = state.password_hash
+        code = status_code // 100
+        with self.lock:
+            self.duration.counts[bisect_left(TIME_BOUNDS, elapsed)] += 1
+            self.duration.sum += elapsed
+            self.queries.counts[bisect_left(COUNT_BOUNDS, queries)] += 1
+            self.queries.sum += queries
+            self.db_duration.counts[bisect_left(TIME_BOUNDS, db_time) if db_time else 0] += 1
+            self.db_duration.sum += db_time
+            # Most requests hash nothing, and many serialize nothing
+            self.serializer.counts[bisect_left(TIME_BOUNDS, serializer) if serializer else 0] += 1
+            self.serializer.sum += serializer
+            self.password_hash.counts[bisect_left(TIME_BOUNDS, password_hash) if password_hash else 0] += 1
+            self.password_hash.sum += password_hash
+            self.responses[code] = self.responses.get(code, 0) + 1
+
+
+class Registry:
+    """
+    Metrics per URL name. Memory is fixed per view, and views are bounded
+    by the URLconf (unresolved paths share one entry).
+    """
+
+    def __init__(self):
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def view(self, name):
+        metrics = self._views.get(name)
+        if metrics is None:
+            with self._lock:
+                metrics = self._views.setdefault(name, ViewMetrics())
+        return metrics
+
+    def items(self):
+        return sorted(self._views.items())
+
+    def clear(self):
+        with self._lock:
+            self._views = {}
+
+
+registry = Registry()
+
+
+def record_phase(phase, seconds):
+    """
+    Add time to a phase of the current request, if one is being measured
+    """
+    state = _current.get()
+    if state is not None:
+        setattr(state, phase, getattr(state, phase) + seconds)
+
+
+class timed_phase:
+    """
+    Context manager counting the time spent inside it towards phase of the
+    current request; nested uses (a nested serializer's .data) are only
+    counted once
+    """
+    __slots__ = ('phase', 'state', 'outer', 'start')
+
+    def __init__(self, phase):
+        self.phase = phase
+        self.state = None
+
+    def __enter__(self):
+        state = _current.get()
+        if state is None or state.active == self.phase:
+            return
+        self.state = state
+        self.outer = state.active
+        state.active = self.phase
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        state = self.state
+        if state is None:
+            return
+        setattr(state, self.phase, getattr(state, self.phase) + time.perf_counter() - self.start)
+        state.active = self.outer
+
+
+class TimedSerializerMixin:
+    """
+    Mixed into the app's serializers (before the DRF base class) so their
+    validation and rendering count towards the request's serializer phase
+    """
+
+    def is_valid(self, *, raise_exception=False):
+        with timed_phase('serializer'):
+            return super().is_valid(raise_exception=raise_exception)
+
+    @property
+    def data(self):
+        with timed_phase('serializer'):
+            return super().data
+
+
+def _time_query(execute, sql, params, many, context):
+    state = _current.get()
+    if state is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        state.queries += 1
+        state.db_time += time.perf_counter() - start
+
+
+def _install_query_timer(connection):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def _connection_created(sender, connection, **kwargs):
+    _install_query_timer(connection)
+
+
+def install():
+    """
+    Hook query timing into every database connection; called once from
+    AppConfig.ready(). Serializers opt in with TimedSerializerMixin.
+    """
+    connection_created.connect(_connection_created, dispatch_uid='metrics_query_timer')
+    for connection in connections.all(initialized_only=True):
+        _install_query_timer(connection)
+
+
+class TimedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 hasher (same algorithm name, so existing hashes still verify)
+    that reports its time as the request's password_hash phase
+    """
+
+    def encode(self, password, salt, iterations=None):
+        start = time.perf_counter()
+        try:
+            return super().encode(password, salt, iterations)
+        finally:
+            record_phase('password_hash', time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """
+    Times each request and files wall, DB and phase times under the
+    resolved URL name
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RequestState()
+        token = _current.set(state)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current.reset(token)
+        match = request.resolver_match
+        name = (match.url_name if match else None) or 'unresolved'
+        registry.view(name).observe(elapsed, state, response.status_code)
+        return response
+
+
+def _format_bound(bound):
+    return repr(float(bound))
+
+
+def _histogram_lines(lines, metric, view, histogram, exported_bounds):
+    for bound, cumulative in histogram.cumulative(exported_bounds):
+        lines.append(f'{metric}_bucket{{view="{view}",le="{_format_bound(bound)}"}} {cumulative}')
+    lines.append(f'{metric}_bucket{{view="{view}",le="+Inf"}} {histogram.count}')
+    lines.append(f'{metric}_sum{{view="{view}"}} {histogram.sum!r}')
+    lines.append(f'{metric}_count{{view="{view}"}} {histogram.count}')
+
+
+def render_prometheus():
+    """
+    This process's metrics in the Prometheus text exposition format
+    """
+    from .hashing import hashing_pool
+    from .rate_limit import rate_limit_stats
+    from .renderers import render_stats
+
+    histograms = [
+        ('origon_request_duration_seconds', 'Wall time per request', lambda m: m.duration, EXPORTED_TIME_BOUNDS),
+        ('origon_request_db_queries', 'Database queries per request', lambda m: m.queries, COUNT_BOUNDS),
+        ('origon_request_db_duration_seconds', 'Database time per request', lambda m: m.db_duration,
+         EXPORTED_TIME_BOUNDS),
+        ('origon_request_serializer_duration_seconds', 'Serializer validation and rendering time per request',
+         lambda m: m.serializer, EXPORTED_TIME_BOUNDS),
+        ('origon_request_password_hash_duration_seconds', 'Password hashing time per request',
+         lambda m: m.password_hash, EXPORTED_TIME_BOUNDS),
+    ]
+    views = registry.items()
+    lines = []
+    for metric, help_text, pick, bounds in histograms:
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} histogram')
+        for name, view_metrics in views:
+            with view_metrics.lock:
+                _histogram_lines(lines, metric, name, pick(view_metrics), bounds)
+
+    lines.append('# HELP origon_responses_total Responses by status class')
+    lines.append('# TYPE origon_responses_total counter')
+    for name, view_metrics in views:
+        with view_metrics.lock:
+            responses = sorted(view_metrics.responses.items())
+        for code, total in responses:
+            lines.append(f'origon_responses_total{{view="{name}",code="{code}xx"}} {total}')
+
+    lines.append('# HELP origon_auth_rate_limit_total Login/registration attempts by rate limit outcome')
+    lines.append('# TYPE origon_auth_rate_limit_total counter')
+    for rule, stats in sorted(rate_limit_stats().items()):
+        for outcome in ('allowed', 'rejected'):
+            lines.append(f'origon_auth_rate_limit_total{{rule="{rule}",outcome="{outcome}"}} {stats[outcome]}')
+
+    pool = hashing_pool.stats()
+    lines.append('# HELP origon_hashing_pool_in_flight Password hashing jobs queued or running')
+    lines.append('# TYPE origon_hashing_pool_in_flight gauge')
+    lines.append(f'origon_hashing_pool_in_flight {pool["in_flight"]}')
+    lines.append('# HELP origon_hashing_pool_rejected_total Hashing jobs refused because the queue was full')
+    lines.append('# TYPE origon_hashing_pool_rejected_total counter')
+    lines.append(f'origon_hashing_pool_rejected_total {pool["rejected"]}')
+    lines.append('# HELP origon_hashing_pool_queue_depth Password hashing jobs waiting for a worker')
+    lines.append('# TYPE origon_hashing_pool_queue_depth gauge')
+    lines.append(f'origon_hashing_pool_queue_depth {pool["queue_depth"]}')
+    lines.append('# HELP origon_hashing_pool_wait_seconds Time hashing jobs waited for a worker')
+    lines.append('# TYPE origon_hashing_pool_wait_seconds summary')
+    lines.append(f'origon_hashing_pool_wait_seconds_sum {pool["wait_avg"] * pool["completed"]!r}')
+    lines.append(f'origon_hashing_pool_wait_seconds_count {pool["completed"]}')
+    lines.append('# HELP origon_hashing_pool_wait_max_seconds Longest wait for a hashing worker')
+    lines.append('# TYPE origon_hashing_pool_wait_max_seconds gauge')
+    lines.append(f'origon_hashing_pool_wait_max_seconds {pool["wait_max"]!r}')
+
+    rendered = render_stats.snapshot()
+    encoder = rendered['encoder']
+    lines.append('# HELP origon_json_render_seconds Time spent encoding JSON responses')
+    lines.append('# TYPE origon_json_render_seconds summary')
+    lines.append(f'origon_json_render_seconds_sum{{encoder="{encoder}"}} {rendered["seconds"]!r}')
+    lines.append(f'origon_json_render_seconds_count{{encoder="{encoder}"}} {rendered["count"]}')
+    lines.append('# HELP origon_json_render_bytes_total Bytes of JSON response bodies encoded')
+    lines.append('# TYPE origon_json_render_bytes_total counter')
+    lines.append(f'origon_json_render_bytes_total{{encoder="{encoder}"}} {rendered["bytes"]}')
+    lines.append('# HELP origon_json_render_max_bytes Largest JSON response body encoded')
+    lines.append('# TYPE origon_json_render_max_bytes gauge')
+    lines.append(f'origon_json_render_max_bytes{{encoder="{encoder}"}} {rendered["max_bytes"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def _may_scrape(request):
+    # Staff sessions, or a scraper sending "Authorization: Bearer <METRICS_TOKEN>"
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_active and user.is_staff:
+        return True
+    expected = getattr(settings, 'METRICS_TOKEN', '')
+    if not expected:
+        return False
+    keyword, _, supplied = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    return keyword == 'Bearer' and hmac.compare_digest(supplied.encode(), expected.encode())
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint, for staff users and holders of METRICS_TOKEN
+    """
+    if not _may_scrape(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,3 @@
+# The host models belong to the host_auth app (its migrations and tables);
+# origon modules import them from here
+from host_auth.models import CustomHost, HostBulkJob, HostFacet, HostToken  # noqa: F401
@@ -0,0 +1,21 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Project default: opaque cursors over the primary key, so every page is an
+    index range scan with no COUNT(*) or OFFSET, however deep the client goes.
+    Views can override `ordering` with another unique, indexed column.
+    """
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class NumberedPagination(PageNumberPagination):
+    """
+    Opt-in page-number pagination for views whose clients need ?page=N and a
+    total count. Cost grows with the page number and table size.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,87 @@
+import functools
+import gzip
+import re
+from collections import Counter
+
+from django.contrib.auth.password_validation import (
+    CommonPasswordValidator,
+    UserAttributeSimilarityValidator,
+    exceeds_maximum_length_ratio,
+    get_default_password_validators,
+)
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+
+
+@functools.cache
+def load_password_list(path):
+    """
+    Read a (possibly gzipped) password list once per process into a frozenset
+    """
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return frozenset(x.strip() for x in f)
+    except OSError:
+        with open(path) as f:
+            return frozenset(x.strip() for x in f)
+
+
+class PreloadedCommonPasswordValidator(CommonPasswordValidator):
+    """
+    CommonPasswordValidator sharing one frozenset per list file instead of
+    decompressing the list for every validator instance
+    """
+
+    def __init__(self, password_list_path=None):
+        if password_list_path is None:
+            password_list_path = self.DEFAULT_PASSWORD_LIST_PATH
+        self.passwords = load_password_list(str(password_list_path))
+
+
+class BoundedUserAttributeSimilarityValidator(UserAttributeSimilarityValidator):
+    """
+    Same decision as UserAttributeSimilarityValidator (which only uses
+    SequenceMatcher.quick_ratio), computed from character counts. Duplicate
+    parts across attributes (city/state/address on hosts) are checked once,
+    and parts sharing no characters with the password are skipped outright.
+    """
+
+    def validate(self, password, user=None):
+        if not user:
+            return
+
+        password = password.lower()
+        password_chars = Counter(password)
+        password_length = len(password)
+        seen = set()
+        for attribute_name in self.user_attributes:
+            value = getattr(user, attribute_name, None)
+            if not value or not isinstance(value, str):
+                continue
+            value_lower = value.lower()
+            for value_part in re.split(r'\W+', value_lower) + [value_lower]:
+                if not value_part or value_part in seen:
+                    continue
+                seen.add(value_part)
+                if password_chars.keys().isdisjoint(value_part):
+                    continue
+                if exceeds_maximum_length_ratio(password, self.max_similarity, value_part):
+                    continue
+                matches = sum((password_chars & Counter(value_part)).values())
+                if 2.0 * matches / (password_length + len(value_part)) >= self.max_similarity:
+                    try:
+                        verbose_name = str(user._meta.get_field(attribute_name).verbose_name)
+                    except FieldDoesNotExist:
+                        verbose_name = attribute_name
+                    raise ValidationError(
+                        self.get_error_message(),
+                        code='password_too_similar',
+                        params={'verbose_name': verbose_name},
+                    )
+
+
+def preload_password_validators():
+    """
+    Build the configured validators (and their data) now rather than inside
+    the first request that validates a password
+    """
+    return get_default_password_validators()
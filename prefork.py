@@ -0,0 +1,228 @@
+"""
+Preforking WSGI entry point for origon.
+
+The master imports and warms the whole app once (settings, URL resolvers,
+views, serializers, email and password-validator data), freezes everything
+it allocated out of the garbage collector's reach and then forks the
+workers, which share those pages copy-on-write instead of each building
+their own copy.
+
+    python -m origon.prefork --bind 127.0.0.1:8000 --workers 8
+
+Send SIGUSR1 to the master to log each worker's memory.
+
+The workers serve HTTP with the standard library's wsgiref server. It is
+not hardened: it speaks HTTP/1.0 only (no keep-alive), has no request
+size limits and no protection against slow clients beyond the per-
+connection --timeout. Run it behind a reverse proxy (nginx, a load
+balancer) that buffers requests, never exposed directly.
+"""
+
+import argparse
+import atexit
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'origon.settings')
+
+
+def preload():
+    """
+    Load the app and everything the first requests would otherwise load
+    lazily, and return the WSGI application
+    """
+    # Collections during loading would leave freed holes in pages that the
+    # workers then share; nothing loaded here is garbage anyway
+    gc.disable()
+    from django.core.wsgi import get_wsgi_application
+    application = get_wsgi_application()
+
+    from django.db import connections
+    from django.urls import URLResolver, get_resolver
+    from .email_normalization import preload_email_validator
+    from .fast_serializers import FastReadSerializer
+    from .password_validation import preload_password_validators
+
+    # Imports every view (and with them the serializers) and builds the
+    # reverse lookup tables of each included URLconf
+    resolvers = [get_resolver()]
+    while resolvers:
+        resolver = resolvers.pop()
+        resolver.reverse_dict
+        resolvers.extend(p for p in resolver.url_patterns if isinstance(p, URLResolver))
+    for serializer_class in FastReadSerializer.__subclasses__():
+        serializer_class.compiled()
+    preload_email_validator()
+    preload_password_validators()
+    # Workers must open their own database connections
+    connections.close_all()
+    return application
+
+
+def memory(pid):
+    """
+    Rss, Pss and private (unshared) memory of a process in KiB, from
+    /proc/<pid>/smaps_rollup
+    """
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as handle:
+        for line in handle:
+            name, _, value = line.partition(':')
+            if value.strip().endswith('kB'):
+                fields[name] = int(value.split()[0])
+    return {
+        'rss': fields['Rss'],
+        'pss': fields['Pss'],
+        'private': fields['Private_Clean'] + fields['Private_Dirty'],
+    }
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    access_log = False
+    # Seconds a connection may sit idle mid-request before it is dropped
+    timeout = 30
+
+    def handle(self):
+        try:
+            super().handle()
+        except TimeoutError:
+            # Slow or idle client; the connection is simply dropped
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        if self.access_log:
+            super().log_message(format, *args)
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class Master:
+    def __init__(self, application, listener, workers, threads):
+        self.application = application
+        self.listener = listener
+        self.workers = workers
+        self.threads = threads
+        self.children = {}
+        self.stopping = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return
+        code = 0
+        try:
+            self.serve()
+        except SystemExit:
+            pass
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            code = 1
+        finally:
+            # Never return into the master's code; flush what this worker
+            # buffered (token renewals) and leave
+            atexit._run_exitfuncs()
+            os._exit(code)
+
+    def serve(self):
+        signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGUSR1, signal.SIG_DFL)
+        gc.enable()
+        if self.application is None:
+            from django.core.wsgi import get_wsgi_application
+            self.application = get_wsgi_application()
+        server_class = ThreadingWSGIServer if self.threads > 1 else WSGIServer
+        server = server_class(self.listener.getsockname()[:2], QuietRequestHandler, bind_and_activate=False)
+        server.socket.close()
+        server.socket = self.listener
+        server.server_name, server.server_port = self.listener.getsockname()[:2]
+        server.setup_environ()
+        server.set_app(self.application)
+        server.serve_forever()
+
+    def log_memory(self, *args):
+        master = memory(os.getpid())
+        sys.stderr.write(f'master {os.getpid()}: {master}\n')
+        for pid in sorted(self.children):
+            try:
+                sys.stderr.write(f'worker {pid}: {memory(pid)}\n')
+            except OSError:
+                pass
+
+    def stop(self, *args):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGUSR1, self.log_memory)
+        for _ in range(self.workers):
+            self.spawn()
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except InterruptedError:
+                continue
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            sys.stderr.write(f'worker {pid} exited with status {status}, restarting\n')
+            # Don't spin if workers die straight away (broken deploy)
+            if time.monotonic() - started < 1:
+                time.sleep(1)
+            self.spawn()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bind', default='127.0.0.1:8000', help='host:port to listen on')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        '--threads', type=int, default=4,
+        help='Request threads per worker, so one slow client cannot stall a worker'
+    )
+    parser.add_argument('--timeout', type=float, default=30, help='Seconds before an idle connection is dropped')
+    parser.add_argument('--backlog', type=int, default=2048)
+    parser.add_argument(
+        '--no-preload', action='store_true',
+        help='Fork first and load the app in every worker (for comparison)'
+    )
+    parser.add_argument('--access-log', action='store_true')
+    options = parser.parse_args(argv)
+
+    host, _, port = options.bind.rpartition(':')
+    listener = socket.create_server((host, int(port)), backlog=options.backlog, reuse_port=False)
+    QuietRequestHandler.access_log = options.access_log
+    QuietRequestHandler.timeout = options.timeout
+
+    if options.no_preload:
+        application = None
+    else:
+        application = preload()
+        gc.freeze()
+    sys.stderr.write(
+        f'master {os.getpid()} serving on {options.bind} with {options.workers} workers '
+        f'({"no preload" if options.no_preload else f"{gc.get_freeze_count()} objects frozen"})\n'
+    )
+    Master(application, listener, options.workers, options.threads).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from ipaddress import ip_address, ip_network
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from .email_normalization import InvalidEmailError, normalize_email
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets per key (capacity attempts, refilled at per_minute), kept in
+    independently locked shards so concurrent requests rarely contend. Each
+    shard keeps its max_keys most recently used buckets. With shared_alias
+    set, a fixed-window counter in that Django cache also caps the total
+    across worker processes.
+    """
+
+    def __init__(self, name, capacity, per_minute, shards=32, max_keys=100000, shared_alias=None):
+        self.name = name
+        self.capacity = capacity
+        self.rate = per_minute / 60.0
+        self.max_keys = max(1, max_keys // shards)
+        self.shared_alias = shared_alias
+        # (lock, buckets, [allowed, rejected]) per shard
+        self._shards = [(threading.Lock(), OrderedDict(), [0, 0]) for _ in range(shards)]
+
+    def _shard(self, key):
+        return self._shards[zlib.crc32(key.encode()) % len(self._shards)]
+
+    def hit(self, key):
+        """
+        Take one token for key; returns None when allowed, otherwise the
+        seconds until a token is available
+        """
+        now = time.monotonic()
+        lock, buckets, counts = self._shard(key)
+        with lock:
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = [float(self.capacity), now]
+                if len(buckets) > self.max_keys:
+                    buckets.popitem(last=False)
+            else:
+                buckets.move_to_end(key)
+                bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < 1:
+                counts[1] += 1
+                return (1 - bucket[0]) / self.rate if self.rate else 60.0
+            bucket[0] -= 1
+            if not self.shared_alias:
+                counts[0] += 1
+                return None
+
+        wait = self._shared_hit(key)
+        with lock:
+            counts[0 if wait is None else 1] += 1
+        return wait
+
+    def _shared_hit(self, key):
+        cache = caches[self.shared_alias]
+        window = int(time.time() // 60)
+        cache_key = f'rate-limit:{self.name}:{key}:{window}'
+        # add() seeds the window atomically; incr() is atomic on shared backends
+        cache.add(cache_key, 0, 90)
+        try:
+            count = cache.incr(cache_key)
+        except ValueError:
+            return None
+        if count > max(self.capacity, self.rate * 60):
+            return 60 - time.time() % 60
+        return None
+
+    def reset(self):
+        for lock, buckets, counts in self._shards:
+            with lock:
+                buckets.clear()
+                counts[:] = [0, 0]
+
+    def stats(self):
+        allowed = rejected = keys = 0
+        for lock, buckets, counts in self._shards:
+            with lock:
+                allowed += counts[0]
+                rejected += counts[1]
+                keys += len(buckets)
+        return {'allowed': allowed, 'rejected': rejected, 'tracked_keys': keys}
+
+
+def _build_limiters():
+    options = getattr(settings, 'AUTH_RATE_LIMIT', {})
+    return {
+        name: TokenBucketLimiter(
+            name, rule['CAPACITY'], rule['PER_MINUTE'],
+            shards=options.get('SHARDS', 32),
+            max_keys=options.get('MAX_KEYS', 100000),
+            shared_alias=options.get('SHARED_CACHE_ALIAS'),
+        )
+        for name, rule in options.get('RULES', {}).items()
+    }
+
+
+limiters = _build_limiters()
+
+# Limiters consulted per endpoint kind, and which request value keys them
+SCOPES = {
+    'login': [('login_ip', 'ip'), ('login_email', 'email')],
+    'register': [('register_ip', 'ip')],
+}
+
+
+def email_key(value):
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        return normalize_email(value)
+    except InvalidEmailError:
+        return value.lower().strip()
+
+
+def check_auth_attempt(kind, ip, email=None):
+    """
+    Count one login/register attempt; returns None when it may proceed,
+    otherwise the seconds the client should wait
+    """
+    keys = {'ip': ip, 'email': email_key(email)}
+    for name, key_type in SCOPES[kind]:
+        limiter = limiters.get(name)
+        key = keys[key_type]
+        if limiter is None or not key:
+            continue
+        # Stop at the first refusal so it does not drain the other buckets
+        retry_after = limiter.hit(key)
+        if retry_after is not None:
+            return retry_after
+    return None
+
+
+def rate_limit_stats():
+    return {name: limiter.stats() for name, limiter in limiters.items()}
+
+
+@lru_cache(maxsize=8)
+def _networks(proxies):
+    return tuple(ip_network(proxy, strict=False) for proxy in proxies)
+
+
+def _is_trusted(address, networks):
+    try:
+        address = ip_address(address)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def client_ip(request):
+    """
+    The client's address: REMOTE_ADDR, unless that is one of
+    TRUSTED_PROXIES, in which case the last X-Forwarded-For entry not
+    added by a trusted proxy. Entries before it may be forged by the
+    client, so they are never used.
+    """
+    remote = request.META.get('REMOTE_ADDR', '')
+    networks = _networks(tuple(getattr(settings, 'TRUSTED_PROXIES', ())))
+    if not networks or not _is_trusted(remote, networks):
+        return remote
+    forwarded = [part.strip() for part in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')]
+    for address in reversed(forwarded):
+        if address and not _is_trusted(address, networks):
+            return address
+    return remote
+
+
+class AuthRateThrottle(BaseThrottle):
+    """
+    DRF throttle running check_auth_attempt before the view parses
+    credentials, so rejected attempts never reach password hashing or the
+    database
+    """
+    kind = None
+
+    def allow_request(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        self.retry_after = check_auth_attempt(self.kind, client_ip(request), email)
+        return self.retry_after is None
+
+    def wait(self):
+        return self.retry_after
+
+
+class LoginRateThrottle(AuthRateThrottle):
+    kind = 'login'
+
+
+class RegisterRateThrottle(AuthRateThrottle):
+    kind = 'register'
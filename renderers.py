@@ -0,0 +1,129 @@
+import threading
+import time
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class RenderStats:
+    """
+    Running totals of JSON encode time and payload size for this process
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.max_bytes = 0
+
+    def record(self, seconds, size):
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.bytes += size
+            if size > self.max_bytes:
+                self.max_bytes = size
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'encoder': 'orjson' if orjson is not None else 'json',
+                'count': self.count,
+                'seconds': self.seconds,
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+render_stats = RenderStats()
+
+
+def _default(obj):
+    # Reuse DRF's handling for datetimes, decimals, UUIDs, lazy strings, ...
+    return encoders.JSONEncoder().default(obj)
+
+
+def encode_json(data):
+    """
+    Encode to compact UTF-8 JSON bytes matching JSONRenderer's output
+    """
+    if orjson is None:
+        return JSONRenderer().render(data)
+    try:
+        ret = orjson.dumps(data, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    except TypeError:
+        # e.g. integers wider than 64 bits
+        return JSONRenderer().render(data)
+    if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+        # JSONRenderer escapes U+2028/U+2029 so output stays a JavaScript subset
+        ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return ret
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer using orjson when it is installed. Indented output (browsable
+    API, ?indent=) and non-compact settings go through the stock encoder.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        start = time.perf_counter()
+        if (
+            self.get_indent(accepted_media_type, renderer_context or {}) is not None
+            or not self.compact or self.ensure_ascii
+        ):
+            ret = super().render(data, accepted_media_type, renderer_context)
+        else:
+            ret = encode_json(data)
+        render_stats.record(time.perf_counter() - start, len(ret))
+        return ret
+
+
+def stream_json_list(items, chunk_size=500):
+    """
+    Yield a JSON array chunk by chunk, so at most chunk_size items are held
+    in memory at once
+    """
+    seconds = 0.0
+    size = 2
+    separator = b''
+    yield b'['
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) < chunk_size:
+            continue
+        start = time.perf_counter()
+        body = separator + encode_json(chunk)[1:-1]
+        seconds += time.perf_counter() - start
+        size += len(body)
+        separator = b','
+        chunk = []
+        yield body
+    if chunk:
+        start = time.perf_counter()
+        body = separator + encode_json(chunk)[1:-1]
+        seconds += time.perf_counter() - start
+        size += len(body)
+        yield body
+    yield b']'
+    render_stats.record(seconds, size)
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """
+    Streams an iterable of dicts as a JSON array
+    """
+
+    def __init__(self, items, chunk_size=500, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(stream_json_list(items, chunk_size), **kwargs)
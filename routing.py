@@ -0,0 +1,105 @@
+import contextvars
+import hashlib
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+# Per-request routing state: {'pinned': bool, 'wrote': bool, 'credentials':
+# list}. A mutable dict so writes made inside sync_to_async threads are seen
+# by the middleware.
+_request_state = contextvars.ContextVar('db_routing_state', default=None)
+
+PIN_COOKIE = 'db_pinned'
+
+
+def replica_aliases():
+    return [alias for alias in getattr(settings, 'DATABASE_REPLICAS', []) if alias in connections.settings]
+
+
+def pin_seconds():
+    # Longer than the worst replication lag, e.g. the sync_replica interval
+    return getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 10)
+
+
+class ReplicaRouter:
+    """
+    Sends reads to a replica alias (settings.DATABASE_REPLICAS) and writes to
+    'default'. Reads stay on 'default' inside a transaction, after a write in
+    the same request, and for pin_seconds() after a client's last write
+    (ReplicaPinMiddleware), so clients always read their own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if not replicas or connections['default'].in_atomic_block:
+            return 'default'
+        state = _request_state.get()
+        if state is not None and (state['pinned'] or state['wrote']):
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state['wrote'] = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+def _credential_pin_key(authorization):
+    return 'db-pin:' + hashlib.sha256(authorization.encode()).hexdigest()
+
+
+def _pin_key(request):
+    # Token clients rarely keep cookies, so they are pinned by credential
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if not authorization:
+        return None
+    return _credential_pin_key(authorization)
+
+
+def pin_credentials(*authorizations):
+    """
+    Pin the Authorization header values of credentials issued during this
+    request as well, so a client that has just registered or logged in
+    reads its own writes with the new token
+    """
+    state = _request_state.get()
+    if state is not None:
+        state['credentials'].extend(authorizations)
+
+
+class ReplicaPinMiddleware:
+    """
+    Tracks writes per request and keeps the writing client on the primary
+    for a while afterwards, via a cookie and (for Authorization-header
+    clients) a cache entry
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = _pin_key(request)
+        pinned = PIN_COOKIE in request.COOKIES or bool(key and cache.get(key))
+        state = {'pinned': pinned, 'wrote': False, 'credentials': []}
+        reset = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(reset)
+        if state['wrote']:
+            response.set_cookie(PIN_COOKIE, '1', max_age=pin_seconds(), httponly=True, samesite='Lax')
+            keys = [_credential_pin_key(value) for value in state['credentials']]
+            if key:
+                keys.append(key)
+            if keys:
+                cache.set_many(dict.fromkeys(keys, True), pin_seconds())
+        return response
@@ -0,0 +1,99 @@
+import re
+from functools import reduce
+from operator import or_
+
+from django.db import connections, router
+from django.db.models import Case, Q, When
+from django.db.models.expressions import RawSQL
+
+from .models import CustomHost
+
+# Columns of the host search index, in the order the FTS table declares them
+SEARCH_FIELDS = ('email', 'full_name', 'business_name', 'phone_number', 'city')
+# bm25 column weights: an email or name hit outranks a city hit
+SEARCH_WEIGHTS = (10.0, 5.0, 5.0, 3.0, 1.0)
+FTS_TABLE = 'host_auth_customhost_fts'
+
+_TERM_TOKENS = re.compile(r'\w+')
+
+
+def match_expression(term):
+    """
+    FTS5 query matching every word of `term` as a prefix, or None when the
+    term has no searchable words. Words are quoted so user input can never
+    be read as FTS5 syntax.
+    """
+    tokens = _TERM_TOKENS.findall(term.lower())
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def uses_fts(using):
+    # The index and its triggers are only created on SQLite (see migration 0005)
+    return connections[using].vendor == 'sqlite'
+
+
+def _like_filter(term):
+    # What ModelAdmin.search_fields does, for databases without the index
+    return reduce(or_, (Q(**{f'{field}__icontains': term}) for field in SEARCH_FIELDS))
+
+
+def filter_hosts(queryset, term):
+    """
+    Narrow a host queryset to the hosts matching `term`
+    """
+    if not uses_fts(queryset.db):
+        return queryset.filter(_like_filter(term))
+    expression = match_expression(term)
+    if expression is None:
+        return queryset.none()
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [expression]
+    ))
+
+
+def ranked_host_ids(term, limit=20, using=None):
+    """
+    Ids of the best `limit` hosts for `term`, best match first
+    """
+    using = using or router.db_for_read(CustomHost)
+    if not uses_fts(using):
+        return list(
+            CustomHost.objects.using(using).filter(_like_filter(term))
+            .order_by('-id').values_list('id', flat=True)[:limit]
+        )
+    expression = match_expression(term)
+    if expression is None:
+        return []
+    weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s',
+            [expression, limit]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_hosts(term, limit=20, using=None):
+    """
+    The best `limit` hosts for `term`, in rank order
+    """
+    using = using or router.db_for_read(CustomHost)
+    hosts = CustomHost.objects.using(using)
+    ids = ranked_host_ids(term, limit, using=using)
+    if not ids:
+        return hosts.none()
+    rank = Case(*[When(pk=pk, then=position) for position, pk in enumerate(ids)])
+    return hosts.filter(pk__in=ids).order_by(rank)
+
+
+def rebuild_index(using='default'):
+    """
+    Re-read every host into the search index (after restores or raw imports
+    that bypassed the triggers)
+    """
+    if uses_fts(using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')")
@@ -1,11 +1,15 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.password_validation import validate_password
-from email_validator import validate_email, EmailNotValidError
+from .email_normalization import InvalidEmailError, normalize_email
+from .fast_serializers import FastReadSerializer
+from .login_events import DISABLED, FAILURE
+from .metrics import TimedSerializerMixin
 from .models import CustomHost
 
 
-class HostRegistrationSerializer(serializers.ModelSerializer):
+class HostRegistrationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, validators=[validate_password])
     password_confirm = serializers.CharField(write_only=True)
     email = serializers.EmailField(
@@ -37,14 +41,10 @@ class HostRegistrationSerializer(serializers.ModelSerializer):
         return vald
 
     def validate_email(self, value):
-        # Normalize email to lowercase
-        value = value.lower().strip()
-        
         try:
-            # Use email-validator for robust validation
-            validated_email = validate_email(value)
-            value = validated_email.email  # Get the normalized email
-        except EmailNotValidError as e:
+            # Lowercase, strip and validate (memoized, no DNS lookups)
+            value = normalize_email(value)
+        except InvalidEmailError as e:
             raise serializers.ValidationError(f"Please enter a valid email address: {str(e)}")
         
         # Check if email already exists
@@ -53,15 +53,34 @@ class HostRegistrationSerializer(serializers.ModelSerializer):
         return value
 
     def create(self, validated_data):
-        validated_data.pop('password_confirm')
-        password = validated_data.pop('password')
-        host = CustomHost.objects.create_user(**validated_data)
-        host.set_password(password)
+        # Async views hash on the hashing pool and pass the result in via save()
+        encoded_password = validated_data.pop('encoded_password', None)
+        host = build_host(validated_data, encoded_password)
         host.save()
         return host
 
 
-class HostLoginSerializer(serializers.Serializer):
+def build_host(validated_data, encoded_password=None):
+    """
+    Build an unsaved host with its password already set, so creating it is a
+    single INSERT (bulk onboarding passes these straight to bulk_create)
+    """
+    data = dict(validated_data)
+    data.pop('password_confirm', None)
+    password = data.pop('password', None)
+    host = CustomHost(**data)
+    host.email = CustomHost.objects.normalize_email(host.email)
+    host.username = CustomHost.normalize_username(host.username)
+    host.password = encoded_password or make_password(password)
+    return host
+
+
+class HostLoginSerializer(TimedSerializerMixin, serializers.Serializer):
+    # The account the email named and how the attempt ended, for the login
+    # audit; set by validate() even when validation fails
+    account = None
+    login_outcome = FAILURE
+
     email = serializers.EmailField(
         error_messages={
             'invalid': 'Please enter a valid email address.',
@@ -72,14 +91,10 @@ class HostLoginSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True)
 
     def validate_email(self, value):
-        # Normalize email to lowercase for consistent login
-        value = value.lower().strip()
-        
         try:
-            # Use email-validator for robust validation
-            validated_email = validate_email(value)
-            value = validated_email.email  # Get the normalized email
-        except EmailNotValidError as e:
+            # Lowercase, strip and validate (memoized, no DNS lookups)
+            value = normalize_email(value)
+        except InvalidEmailError as e:
             raise serializers.ValidationError(f"Please enter a valid email address: {str(e)}")
         
         return value
@@ -89,10 +104,16 @@ class HostLoginSerializer(serializers.Serializer):
         password = vald.get('password')
 
         if email and password:
+            if self.context.get('defer_password_check'):
+                # The caller checks the password off the request thread
+                vald['host'] = CustomHost.objects.filter(email=email).first()
+                return vald
             try:
                 host = CustomHost.objects.get(email=email)
+                self.account = host
                 if host.check_password(password):
                     if not host.is_active:
+                        self.login_outcome = DISABLED
                         raise serializers.ValidationError('Host account is disabled.')
                     vald['host'] = host
                     return vald
@@ -104,7 +125,7 @@ class HostLoginSerializer(serializers.Serializer):
             raise serializers.ValidationError('Must include email and password.')
 
 
-class HostSerializer(serializers.ModelSerializer):
+class HostSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = CustomHost
         fields = (
@@ -116,7 +137,14 @@ class HostSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'date_joined', 'is_active', 'is_verified')
 
 
-class HostProfileSerializer(serializers.ModelSerializer):
+class FastHostSerializer(FastReadSerializer):
+    """
+    Read-only fast path with the same output as HostSerializer
+    """
+    serializer_class = HostSerializer
+
+
+class HostProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = CustomHost
         fields = (
@@ -132,7 +160,7 @@ class HostProfileSerializer(serializers.ModelSerializer):
         return instance
 
 
-class ChangeHostPasswordSerializer(serializers.Serializer):
+class ChangeHostPasswordSerializer(TimedSerializerMixin, serializers.Serializer):
     old_password = serializers.CharField(write_only=True)
     new_password = serializers.CharField(write_only=True, validators=[validate_password])
     new_password_confirm = serializers.CharField(write_only=True)
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -40,14 +42,13 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework.authtoken',
     'authentication',
-<<<<<<< HEAD
     'host_auth',
-=======
->>>>>>> deda353805c47f9bed14619547842e722c4f8b56
 ]
 
 MIDDLEWARE = [
+    'origon.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'origon.routing.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -56,7 +57,8 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'origon.urls'
+# asgi.py points this at origon.asgi_urls
+ROOT_URLCONF = os.environ.get('DJANGO_ROOT_URLCONF', 'origon.urls')
 
 TEMPLATES = [
     {
@@ -79,26 +81,58 @@ WSGI_APPLICATION = 'origon.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLITE_PROFILE=basic restores Django's stock SQLite settings (used as the
+# baseline by the loadtest_auth command). See origon/database.py.
+from origon.database import sqlite_database
+
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'production')
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': sqlite_database(BASE_DIR / 'db.sqlite3', SQLITE_PROFILE),
 }
+if SQLITE_PROFILE == 'production':
+    # Second set of connections to the same file, so reads never queue
+    # behind the writer connection
+    DATABASES['read'] = sqlite_database(BASE_DIR / 'db.sqlite3', SQLITE_PROFILE, read_only=True)
+    DATABASES['read']['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS = ['read']
+# Local stand-in for a lagging read replica: a copy of the database kept up
+# to date by `manage.py sync_replica --interval N`
+if os.environ.get('SQLITE_REPLICA'):
+    DATABASES['replica'] = sqlite_database(os.environ['SQLITE_REPLICA'], SQLITE_PROFILE, read_only=True)
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS = ['replica']
+DATABASE_ROUTERS = ['origon.routing.ReplicaRouter']
+# Seconds a client keeps reading from the primary after a write; keep it
+# above the replica sync interval
+DATABASE_REPLICA_PIN_SECONDS = 10
+
+
+# Same PBKDF2 hashes as Django's default hasher; the subclass only reports
+# hashing time to origon.metrics
+PASSWORD_HASHERS = [
+    'origon.metrics.TimedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
 
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
+# The origon.password_validation variants keep Django's rules but load their
+# data once per process, on first use (see PRELOAD_AUTH_DEPENDENCIES)
 AUTH_PASSWORD_VALIDATORS = [
     {
-        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+        'NAME': 'origon.password_validation.BoundedUserAttributeSimilarityValidator',
     },
     {
         'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
     },
     {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+        'NAME': 'origon.password_validation.PreloadedCommonPasswordValidator',
     },
     {
         'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
@@ -134,19 +168,166 @@ AUTH_USER_MODEL = 'authentication.CustomUser'
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'origon.auth_tokens.SignedTokenAuthentication',
+        'origon.token_cache.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        # orjson when installed, stock json otherwise
+        'origon.renderers.FastJSONRenderer',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Keyset cursors; set pagination_class = NumberedPagination on a view to
+    # opt back into ?page=N
+    'DEFAULT_PAGINATION_CLASS': 'origon.pagination.KeysetPagination',
     'PAGE_SIZE': 20,
 }
 
+# Credentials handed out by register/login (see origon/auth_tokens.py):
+# 'database' issues DRF Token keys ("Authorization: Token <key>"), 'signed'
+# issues short-lived signed access tokens plus refresh tokens ("Authorization:
+# Bearer <access>") that are verified without a token table lookup. Both are
+# accepted whichever mode is set, so clients can move over gradually.
+AUTH_TOKEN_MODE = os.environ.get('AUTH_TOKEN_MODE', 'database')
+
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=5),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+    'AUTH_HEADER_TYPES': ('Bearer',),
+    # Tokens carry a digest of the password hash; changing the password
+    # invalidates all of them
+    'CHECK_REVOKE_TOKEN': True,
+}
+
+# Models signed tokens may be issued for; the token names which one
+SIGNED_TOKEN_USER_MODELS = [AUTH_USER_MODEL, 'host_auth.CustomHost']
+
+# Seconds between refreshes of each process's copy of the revoked-token list
+SIGNED_TOKEN_REVOCATION_SYNC = 5
+
+# Token authentication cache (see origon/token_cache.py)
+# Entries are dropped on logout, password change and user save. With a
+# SHARED_CACHE_ALIAS (a cache all workers share, e.g. Redis or memcached) each
+# hit is checked against a per-user generation there, so evictions reach every
+# worker and TTL can be minutes. Without one, other workers only drop their
+# copy when it expires, so TTL stays at a few seconds.
+TOKEN_CACHE = {
+    'MAX_ENTRIES': 10000,
+    'TTL': 5,
+    'SHARED_CACHE_ALIAS': None,
+}
+
+# DRF Token expiry (origon/token_expiry.py). A token dies TTL seconds after
+# its last renewal; using a token renews it once RENEW_AFTER seconds have
+# passed, and a background thread writes renewals in batches every
+# FLUSH_INTERVAL seconds.
+# `manage.py sweep_tokens` deletes expired rows in batches of SWEEP_BATCH,
+# along with expired signed-token revocations.
+TOKEN_EXPIRY = {
+    'TTL': 14 * 24 * 3600,
+    'RENEW_AFTER': 3600,
+    'FLUSH_INTERVAL': 30,
+    'SWEEP_BATCH': 500,
+}
+
+# Login audit rows (authentication.LoginEvent) and last_login updates are
+# queued in memory and written by a background thread every FLUSH_INTERVAL
+# seconds, or once BATCH_SIZE events are waiting (origon/login_events.py).
+# A crashed worker loses at most that much; MAX_PENDING caps the queue if
+# the database is unavailable.
+LOGIN_EVENTS = {
+    'FLUSH_INTERVAL': 5,
+    'BATCH_SIZE': 500,
+    'MAX_PENDING': 50000,
+}
+
+# Bounded pool for password hashing in the async login/register views.
+# Requests beyond MAX_WORKERS + MAX_QUEUE are answered with 503.
+PASSWORD_HASHING_POOL = {
+    'KIND': 'thread',  # or 'process'
+    'MAX_WORKERS': 4,
+    'MAX_QUEUE': 64,
+}
+
+# Separate pool for bulk host onboarding so batches never queue behind logins
+BULK_PASSWORD_HASHING_POOL = {
+    'KIND': 'process',
+    'MAX_WORKERS': 4,
+    'MAX_QUEUE': 1000,
+}
+
+# Addresses or networks of the reverse proxies in front of the app. A request
+# from one of them is limited (and audited) by the nearest X-Forwarded-For
+# entry no trusted proxy added; otherwise X-Forwarded-For is ignored. Comma
+# separated, e.g. TRUSTED_PROXIES=127.0.0.1,10.0.0.0/8
+TRUSTED_PROXIES = [proxy for proxy in os.environ.get('TRUSTED_PROXIES', '').split(',') if proxy]
+
+# Token-bucket limits on login/registration attempts (origon/rate_limit.py),
+# checked before any password hashing or database work. CAPACITY is the
+# burst, PER_MINUTE the refill rate. Buckets live in each worker's memory;
+# SHARED_CACHE_ALIAS adds a per-minute cap shared by all workers.
+AUTH_RATE_LIMIT = {
+    'RULES': {
+        'login_ip': {'CAPACITY': 20, 'PER_MINUTE': 20},
+        'login_email': {'CAPACITY': 5, 'PER_MINUTE': 5},
+        'register_ip': {'CAPACITY': 10, 'PER_MINUTE': 5},
+    },
+    'SHARDS': 32,
+    'MAX_KEYS': 100000,
+    'SHARED_CACHE_ALIAS': None,
+}
+
+# Load email_validator and the password validators' data at boot instead of
+# in the first login/registration, so no user request pays for it (see
+# `manage.py profile_startup`). On by default for every server entry point;
+# set PRELOAD_AUTH_DEPENDENCIES=0 for short-lived processes that never log
+# anyone in.
+PRELOAD_AUTH_DEPENDENCIES = os.environ.get('PRELOAD_AUTH_DEPENDENCIES', '1') == '1'
+
+# Per-view request histograms (origon/metrics.py) are served in Prometheus
+# text format at /metrics to staff users and to scrapers sending this value
+# as a bearer token; with no token set, only staff can scrape
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Max distinct addresses kept by the memoized email normalizer
+# (origon/email_normalization.py); invalid addresses are cached as well
+EMAIL_NORMALIZATION_CACHE_SIZE = 4096
+
+# Admin bulk verify/unverify (origon/jobs.py): selections larger than one
+# chunk run in the background, one transaction per CHUNK_SIZE hosts, sleeping
+# PAUSE seconds between chunks so logins can take the write lock
+HOST_BULK_JOBS = {
+    'CHUNK_SIZE': 500,
+    'PAUSE': 0.05,
+}
+
 # Login/Logout URLs for DRF
 LOGIN_URL = '/auth/api/login/'
 LOGOUT_URL = '/auth/api/logout/'
+
+# WORKER_PROFILE=api trims a worker down to what token clients use: no
+# admin, sessions, messages or CSRF middleware, and no SessionAuthentication.
+# Run the admin on separate workers left on the default 'full' profile and
+# route /admin/ to them at the proxy.
+WORKER_PROFILE = os.environ.get('WORKER_PROFILE', 'full')
+if WORKER_PROFILE == 'api':
+    INSTALLED_APPS = [
+        app for app in INSTALLED_APPS
+        if app not in ('django.contrib.admin', 'django.contrib.sessions', 'django.contrib.messages')
+    ]
+    MIDDLEWARE = [
+        'origon.metrics.MetricsMiddleware',
+        'django.middleware.security.SecurityMiddleware',
+        'origon.routing.ReplicaPinMiddleware',
+        'django.middleware.common.CommonMiddleware',
+    ]
+    TEMPLATES[0]['OPTIONS']['context_processors'] = [
+        'django.template.context_processors.request',
+    ]
+    REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'] = [
+        'origon.auth_tokens.SignedTokenAuthentication',
+        'origon.token_cache.CachedTokenAuthentication',
+    ]
+    ROOT_URLCONF = os.environ.get('DJANGO_ROOT_URLCONF', 'origon.api_urls')
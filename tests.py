@@ -1 +1,978 @@
-# Create your tests here.
\ No newline at end of file
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import urllib.request
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib import admin
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from authentication import async_views as user_async_views
+from authentication.management.commands import replay_requests
+from host_auth.admin import FacetChangeList, HostBulkJobAdmin
+
+from . import (
+    auth_tokens, email_normalization, facets, jobs, metrics, rate_limit, renderers, routing,
+    token_cache as token_cache_module,
+)
+from .hashing import HashingPool
+from .login_events import DISABLED, FAILURE, SUCCESS, login_events
+from .models import CustomHost, HostBulkJob, HostFacet, HostToken
+from .pagination import KeysetPagination
+from .renderers import FastJSONRenderer, render_stats, stream_json_list
+from .token_cache import TokenCache
+from .token_expiry import RenewalBuffer
+from .versioning import object_etag
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class TokenCacheEvictionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='alice', email='alice@example.com', password='Old-passw0rd!', full_name='Alice'
+        )
+        self.token = Token.objects.create(user=self.user)
+        # Two workers sharing the 'default' cache; this process is `worker`
+        self.worker = TokenCache(ttl=300, shared_alias='default')
+        self.other = TokenCache(ttl=300, shared_alias='default')
+        for module in (token_cache_module, auth_tokens):
+            patcher = mock.patch.object(module, 'token_cache', self.worker)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = APIClient(REMOTE_ADDR='10.1.0.1')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def cache_in_other_worker(self):
+        generation = self.other.generation(self.user._meta.label_lower, self.user.pk)
+        self.other.set(self.token.key, self.user, self.token, generation)
+        self.assertIsNotNone(self.other.get(self.token.key))
+
+    def test_logout_evicts_token(self):
+        self.assertEqual(self.client.get('/auth/api/profile/').status_code, 200)
+        self.assertIsNotNone(self.worker.get(self.token.key))
+        self.cache_in_other_worker()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post('/auth/api/logout/').status_code, 200)
+
+        self.assertIsNone(self.worker.get(self.token.key))
+        self.assertIsNone(self.other.get(self.token.key))
+        self.assertEqual(self.client.get('/auth/api/profile/').status_code, 401)
+
+    def test_password_change_evicts_token(self):
+        self.assertEqual(self.client.get('/auth/api/profile/').status_code, 200)
+        self.cache_in_other_worker()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/auth/api/change-password/', {
+                'old_password': 'Old-passw0rd!',
+                'new_password': 'N3w-passw0rd!x',
+                'new_password_confirm': 'N3w-passw0rd!x',
+            })
+        self.assertEqual(response.status_code, 200)
+
+        self.assertIsNone(self.worker.get(self.token.key))
+        self.assertIsNone(self.other.get(self.token.key))
+        self.assertEqual(self.client.get('/auth/api/profile/').status_code, 401)
+
+    def test_user_save_reaches_other_workers(self):
+        self.cache_in_other_worker()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertIsNone(self.other.get(self.token.key))
+
+    def test_password_change_rejects_signed_token_cached_elsewhere(self):
+        refresh = auth_tokens.refresh_for_user(self.user)
+        validated = auth_tokens.SignedTokenAuthentication().get_validated_token(str(refresh.access_token))
+        # Another worker has the user cached from an earlier request
+        with mock.patch.object(auth_tokens, 'token_cache', self.other):
+            auth_tokens.user_from_token(validated)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('N3w-passw0rd!x')
+            self.user.save()
+
+        with mock.patch.object(auth_tokens, 'token_cache', self.other):
+            with self.assertRaises(AuthenticationFailed):
+                auth_tokens.user_from_token(validated)
+
+
+@override_settings(HOST_BULK_JOBS={'CHUNK_SIZE': 2, 'PAUSE': 0})
+class HostBulkJobTests(TestCase):
+
+    def setUp(self):
+        for number in range(5):
+            CustomHost.objects.create(
+                username=f'host{number}', email=f'host{number}@example.com', full_name='Host', phone_number='1'
+            )
+
+    def test_job_runs_on_the_selected_ids(self):
+        selection = CustomHost.objects.exclude(username='host4')
+        with self.captureOnCommitCallbacks():
+            changed, job = jobs.run_action('verify', selection, requested_by='admin')
+        self.assertIsNone(changed)
+        self.assertEqual(job.host_ids, list(selection.order_by('pk').values_list('pk', flat=True)))
+
+        with mock.patch.object(jobs, 'close_old_connections'), self.captureOnCommitCallbacks(execute=True):
+            jobs.run_job(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.changed), (HostBulkJob.DONE, 4, 4))
+        self.assertEqual(
+            list(CustomHost.objects.filter(is_verified=True).values_list('username', flat=True).order_by('pk')),
+            ['host0', 'host1', 'host2', 'host3'],
+        )
+
+
+    def test_job_that_cannot_load_is_marked_failed(self):
+        job = HostBulkJob.objects.create(action='verify', host_ids=[1], total=1)
+        primary = mock.Mock()
+        primary.get.side_effect = DatabaseError('database is locked')
+        with mock.patch.object(jobs, 'close_old_connections'), \
+                mock.patch.object(HostBulkJob.objects, 'using', return_value=primary) as using, \
+                self.assertLogs('origon.jobs', 'ERROR'):
+            jobs.run_job(job.pk)
+        using.assert_called_once_with('default')
+        job.refresh_from_db()
+        self.assertEqual(job.status, HostBulkJob.FAILED)
+
+    def test_admin_action_queues_a_job(self):
+        admin_user = get_user_model().objects.create_superuser(
+            username='admin', email='admin@example.com', password='x', full_name='Admin'
+        )
+        self.client.force_login(admin_user)
+        with self.captureOnCommitCallbacks():
+            response = self.client.post('/admin/host_auth/customhost/', {
+                'action': 'verify_hosts',
+                '_selected_action': list(CustomHost.objects.values_list('pk', flat=True)),
+            }, follow=True)
+        job = HostBulkJob.objects.get()
+        self.assertEqual((job.action, job.total, job.requested_by), ('verify', 5, 'admin@example.com'))
+        self.assertIn(f'follow job #{job.pk}', response.content.decode())
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ReplicaPinTests(TestCase):
+
+    def test_register_pins_the_issued_token(self):
+        cache.clear()
+        response = APIClient(REMOTE_ADDR='10.1.0.2').post('/auth/api/register/', {
+            'username': 'bob', 'email': 'bob@example.com', 'full_name': 'Bob', 'phone_number': '1',
+            'password': 'Str0ng-passw0rd!', 'password_confirm': 'Str0ng-passw0rd!',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(cache.get(routing._credential_pin_key(f'Token {response.data["token"]}')))
+
+
+class TokenExpiryTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='omar', email='omar@example.com', password='x', full_name='Omar'
+        )
+        self.host = CustomHost.objects.create(
+            username='omar', email='omar@example.com', full_name='Omar', phone_number='1'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.host_token = HostToken.objects.create(user=self.host)
+        self.buffer = RenewalBuffer(renew_after=3600, flush_interval=30)
+        self.cache = TokenCache()
+        patchers = [
+            mock.patch.object(token_cache_module, 'renewal_buffer', self.buffer),
+            mock.patch.object(token_cache_module, 'token_cache', self.cache),
+            mock.patch.object(self.buffer, '_ensure_thread'),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def age(self, token, seconds):
+        created = timezone.now() - timedelta(seconds=seconds)
+        type(token).objects.filter(key=token.key).update(created=created)
+        return created
+
+    def authenticate(self, token):
+        return token_cache_module.CachedTokenAuthentication().authenticate_credentials(token.key)
+
+    def test_expired_tokens_are_rejected(self):
+        self.age(self.token, 15 * 24 * 3600)
+        with self.assertRaisesMessage(AuthenticationFailed, 'Token has expired.'):
+            self.authenticate(self.token)
+        self.assertIsNone(self.cache.get(self.token.key))
+
+    def test_renewals_are_queued_then_flushed_in_one_write(self):
+        old_user = self.age(self.token, 7200)
+        old_host = self.age(self.host_token, 7200)
+        # One lookup per table tried; no writes
+        with self.assertNumQueries(3):
+            self.authenticate(self.token)
+            self.authenticate(self.host_token)
+            # Cached and already queued: no query and no second entry
+            self.authenticate(self.token)
+        self.assertEqual(len(self.buffer), 2)
+        self.assertEqual(Token.objects.get(key=self.token.key).created, old_user)
+
+        with self.assertNumQueries(2):
+            self.assertEqual(self.buffer.flush(), 2)
+        self.assertGreater(Token.objects.get(key=self.token.key).created, old_user)
+        self.assertGreater(HostToken.objects.get(key=self.host_token.key).created, old_host)
+        self.assertEqual(len(self.buffer), 0)
+
+    def test_failed_flush_keeps_the_renewals(self):
+        self.age(self.token, 7200)
+        self.authenticate(self.token)
+        with mock.patch.object(Token.objects, 'filter', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.buffer.flush()
+        self.assertEqual(len(self.buffer), 1)
+
+    def test_sweep_deletes_expired_tokens_of_both_kinds(self):
+        self.age(self.token, 15 * 24 * 3600)
+        self.age(self.host_token, 15 * 24 * 3600)
+        fresh = Token.objects.create(user=get_user_model().objects.create_user(
+            username='pia', email='pia@example.com', password='x', full_name='Pia'
+        ))
+        call_command('sweep_tokens', '--pause', '0', stdout=StringIO())
+        self.assertEqual(list(Token.objects.values_list('key', flat=True)), [fresh.key])
+        self.assertFalse(HostToken.objects.exists())
+
+
+@override_settings(
+    ROOT_URLCONF='origon.asgi_urls', PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']
+)
+class AsyncLoginTests(TestCase):
+
+    def setUp(self):
+        get_user_model().objects.create_user(
+            username='judy', email='judy@example.com', password='Right-passw0rd!', full_name='Judy'
+        )
+        self.pool = HashingPool(max_workers=1, max_queue=0)
+        patchers = [mock.patch.object(user_async_views, 'hashing_pool', self.pool)]
+        patchers += [mock.patch.object(login_events, name) for name in ('flush', '_ensure_thread')]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for limiter in rate_limit.limiters.values():
+            limiter.reset()
+
+    async def login(self):
+        return await AsyncClient(REMOTE_ADDR='10.1.0.6').post(
+            '/auth/api/login/', {'email': 'judy@example.com', 'password': 'Right-passw0rd!'},
+            content_type='application/json',
+        )
+
+    async def test_login_hashes_on_the_pool(self):
+        response = await self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('token', response.json())
+        self.assertEqual(self.pool.stats()['completed'], 1)
+
+    async def test_full_pool_sheds_the_login(self):
+        # Another login holds the only slot
+        self.pool._acquire()
+        response = await self.login()
+        self.assertEqual((response.status_code, response['Retry-After']), (503, '1'))
+        self.assertEqual(self.pool.stats()['rejected'], 1)
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        for number in range(5):
+            CustomHost.objects.create(
+                username=f'page{number}', email=f'page{number}@example.com', full_name='Page', phone_number='1'
+            )
+
+    def page(self, url):
+        paginator = KeysetPagination()
+        paginator.page_size = 2
+        request = Request(APIRequestFactory().get(url))
+        with CaptureQueriesContext(connection) as queries:
+            rows = paginator.paginate_queryset(CustomHost.objects.all(), request)
+        sql = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+        return [host.username for host in rows], paginator.get_next_link()
+
+    def test_cursors_walk_the_table_without_count_or_offset(self):
+        seen = []
+        url = '/hosts/'
+        while url:
+            usernames, url = self.page(url)
+            seen.extend(usernames)
+        self.assertEqual(seen, [f'page{number}' for number in reversed(range(5))])
+
+    def test_page_size_is_capped(self):
+        paginator = KeysetPagination()
+        request = Request(APIRequestFactory().get('/hosts/', {'page_size': 1000}))
+        self.assertEqual(paginator.get_page_size(request), KeysetPagination.max_page_size)
+
+
+class JSONRenderingTests(TestCase):
+
+    def test_fast_renderer_matches_the_stock_one(self):
+        data = {
+            'when': datetime(2025, 1, 2, 3, 4, 5, 600000, tzinfo=dt_timezone.utc),
+            'amount': Decimal('12.50'),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'text': 'line\u2028separator \u00e9',
+            'big': 2 ** 70,
+            'nested': [1, 2.5, None, True],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_export_streams_a_json_array(self):
+        for number in range(3):
+            CustomHost.objects.create(
+                username=f'export{number}', email=f'export{number}@example.com', full_name='Export', phone_number='1'
+            )
+        staff = get_user_model().objects.create_user(
+            username='nina', email='nina@example.com', password='x', full_name='Nina', is_staff=True
+        )
+        client = APIClient()
+        client.force_authenticate(staff)
+        before = render_stats.snapshot()['count']
+        with mock.patch.object(renderers, 'encode_json', wraps=renderers.encode_json) as encode:
+            response = client.get('/host/api/export/')
+            body = b''.join(response.streaming_content)
+        self.assertEqual([host['username'] for host in json.loads(body)], ['export0', 'export1', 'export2'])
+        self.assertEqual(encode.call_count, 1)
+        self.assertEqual(render_stats.snapshot()['count'], before + 1)
+
+    def test_stream_json_list_chunks(self):
+        items = [{'n': number} for number in range(5)]
+        chunks = list(stream_json_list(iter(items), chunk_size=2))
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(json.loads(b''.join(chunks)), items)
+        self.assertEqual(b''.join(stream_json_list(iter([]))), b'[]')
+
+
+class EmailNormalizationTests(SimpleTestCase):
+
+    def setUp(self):
+        email_normalization.clear_cache()
+        self.addCleanup(email_normalization.clear_cache)
+
+    def test_normalizes_and_memoizes(self):
+        self.assertEqual(email_normalization.normalize_email('  Kate@Example.COM '), 'kate@example.com')
+        with mock.patch('email_validator.validate_email') as validate:
+            self.assertEqual(email_normalization.normalize_email('KATE@example.com'), 'kate@example.com')
+        validate.assert_not_called()
+        stats = email_normalization.cache_stats()
+        self.assertEqual((stats['hits'], stats['size']), (1, 1))
+
+    def test_invalid_addresses_are_cached_without_dns(self):
+        import email_validator
+        with mock.patch('email_validator.validate_email', wraps=email_validator.validate_email) as validate:
+            for _ in range(2):
+                with self.assertRaises(email_normalization.InvalidEmailError):
+                    email_normalization.normalize_email('not-an-email')
+        validate.assert_called_once_with('not-an-email', check_deliverability=False)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportAccountsTests(TestCase):
+
+    def host_row(self, name, **extra):
+        return {
+            'username': name, 'email': f'{name}@example.com', 'full_name': 'Imported', 'phone_number': '1',
+            'password': 'Str0ng-passw0rd!', 'password_confirm': 'Str0ng-passw0rd!', **extra,
+        }
+
+    def test_bad_rows_are_reported_and_good_ones_imported(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'hosts.jsonl')
+        lines = [
+            json.dumps(self.host_row('kim')),
+            '{not json',
+            json.dumps({'username': 'nomail'}),
+            json.dumps(self.host_row('kim', username='kim2')),
+            json.dumps(self.host_row('lee', password_confirm='different')),
+            json.dumps(self.host_row('max')),
+        ]
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write('\n'.join(lines) + '\n')
+
+        call_command('import_accounts', path, '--workers', '1', '--batch-size', '10', stdout=StringIO())
+
+        self.assertEqual(sorted(CustomHost.objects.values_list('username', flat=True)), ['kim', 'max'])
+        self.assertTrue(CustomHost.objects.get(username='kim').check_password('Str0ng-passw0rd!'))
+        self.assertEqual(facets.approximate_count({}), 2)
+        with open(f'{path}.errors.jsonl', encoding='utf-8') as handle:
+            errors = [json.loads(line) for line in handle]
+        self.assertEqual([error['line'] for error in errors], [2, 3, 4, 5])
+
+        # The checkpoint keeps a re-run from importing the file again
+        output = StringIO()
+        call_command('import_accounts', path, '--workers', '1', stdout=output)
+        self.assertIn('Resuming after line 6', output.getvalue())
+        self.assertEqual(CustomHost.objects.count(), 2)
+
+
+class ReplayRequestsTests(SimpleTestCase):
+
+    def write_log(self, lines):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'requests.jsonl')
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write('\n'.join(lines) + '\n')
+        return path, directory
+
+    def test_bad_lines_are_reported_with_their_number(self):
+        path, _ = self.write_log([json.dumps({'path': '/metrics'}), '', '{not json'])
+        with self.assertRaisesMessage(CommandError, f'{path}:3 is not valid JSON'):
+            replay_requests.load_records(path)
+        path, _ = self.write_log([json.dumps({'method': 'GET'})])
+        with self.assertRaisesMessage(CommandError, f'{path}:1 has no "path"'):
+            replay_requests.load_records(path)
+
+    def test_prepare_fills_placeholders_and_authorization(self):
+        record = {
+            'method': 'post', 'path': '/auth/api/register/?n={seq}',
+            'body': {'email': 'user-{run}-{seq}@example.com'}, 'token': 'abc123',
+        }
+        method, path, data, headers = replay_requests.prepare(record, 'r1', 7)
+        self.assertEqual((method, path), ('POST', '/auth/api/register/?n=7'))
+        self.assertEqual(json.loads(data), {'email': 'user-r1-7@example.com'})
+        self.assertEqual(headers, {'Authorization': 'Token abc123'})
+        self.assertEqual(replay_requests.auth_header('a.b.c'), 'Bearer a.b.c')
+        self.assertEqual(replay_requests.auth_header('Bearer xyz'), 'Bearer xyz')
+        self.assertIsNone(replay_requests.auth_header(''))
+
+    @override_settings(ALLOWED_HOSTS=['localhost'])
+    def test_replay_reports_per_endpoint(self):
+        path, directory = self.write_log([json.dumps({'path': '/auth/api/profile/'})])
+        output = os.path.join(directory, 'results.json')
+        call_command(
+            'replay_requests', path, '--repeat', '3', '--concurrency', '2', '--output', output, stdout=StringIO()
+        )
+        with open(output, encoding='utf-8') as handle:
+            results = json.load(handle)
+        summary = results['endpoints']['GET /auth/api/profile/']
+        self.assertEqual(summary['requests'], 3)
+        self.assertEqual(summary['status'], {'401': 3})
+        self.assertEqual(results['overall']['error_rate'], 1.0)
+
+
+@override_settings(
+    AUTH_TOKEN_MODE='database', PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']
+)
+class HostDatabaseTokenTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient(REMOTE_ADDR='10.1.0.5')
+
+    def test_register_login_and_logout(self):
+        response = self.client.post('/host/api/register/', {
+            'username': 'hana', 'email': 'hana@example.com', 'full_name': 'Hana', 'phone_number': '1',
+            'password': 'Str0ng-passw0rd!', 'password_confirm': 'Str0ng-passw0rd!',
+        })
+        self.assertEqual(response.status_code, 201)
+        host = CustomHost.objects.get(username='hana')
+        self.assertEqual(response.data['token'], HostToken.objects.get(user=host).key)
+
+        response = self.client.post('/host/api/login/', {'email': 'hana@example.com', 'password': 'Str0ng-passw0rd!'})
+        self.assertEqual(response.status_code, 200)
+        key = response.data['token']
+        self.assertEqual(key, host.auth_token.key)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+        profile = self.client.get('/host/api/profile/')
+        self.assertEqual((profile.status_code, profile.data['email']), (200, 'hana@example.com'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post('/host/api/logout/').status_code, 200)
+        self.assertFalse(HostToken.objects.filter(key=key).exists())
+        self.assertEqual(self.client.get('/host/api/profile/').status_code, 401)
+
+
+    def test_bulk_register_issues_host_tokens(self):
+        staff = get_user_model().objects.create_user(
+            username='ivan', email='ivan@example.com', password='x', full_name='Ivan', is_staff=True
+        )
+        self.client.force_authenticate(staff)
+        rows = [
+            {
+                'username': f'bulk{number}', 'email': f'bulk{number}@example.com', 'full_name': 'Bulk',
+                'phone_number': '1', 'password': 'Str0ng-passw0rd!', 'password_confirm': 'Str0ng-passw0rd!',
+            }
+            for number in range(2)
+        ]
+        rows.append({'username': 'broken'})
+        response = self.client.post('/host/api/bulk-register/', {'hosts': rows}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([error['index'] for error in response.data['errors']], [2])
+
+        self.client.force_authenticate(None)
+        for created in response.data['created']:
+            host = CustomHost.objects.get(email=created['host']['email'])
+            self.assertEqual(created['token'], host.auth_token.key)
+            self.client.credentials(HTTP_AUTHORIZATION=f'Token {created["token"]}')
+            self.assertEqual(self.client.get('/host/api/profile/').data['email'], host.email)
+
+class HostQueryPlanTests(TestCase):
+    """
+    Hot host query shapes (admin filters and API lookups) must use the index
+    meant for them; index names are matched in SQLite EXPLAIN QUERY PLAN output
+    """
+
+    def query_shapes(self):
+        hosts = CustomHost.objects.all()
+        january = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        february = datetime(2025, 2, 1, tzinfo=dt_timezone.utc)
+        return [
+            ('filter business_type', hosts.filter(business_type='agency').order_by('-pk'), 'host_business_type_idx'),
+            ('filter unverified', hosts.filter(is_verified=False).order_by('-pk'), 'host_unverified_idx'),
+            ('filter inactive', hosts.filter(is_active=False).order_by('-pk'), 'host_inactive_idx'),
+            ('filter city', hosts.filter(city='Lagos').order_by('-pk'), 'host_city_idx'),
+            ('filter country', hosts.filter(country='Nigeria').order_by('-pk'), 'host_country_idx'),
+            (
+                'filter date_joined range',
+                hosts.filter(date_joined__gte=january, date_joined__lt=february).order_by('-date_joined'),
+                'host_date_joined_idx',
+            ),
+            ('city filter choices', hosts.distinct().order_by('city').values_list('city'), 'host_city_idx'),
+            ('country filter choices', hosts.distinct().order_by('country').values_list('country'), 'host_country_idx'),
+            (
+                'verified and active hosts',
+                hosts.filter(is_verified=True, is_active=True).order_by('-pk'),
+                'host_verified_active_idx',
+            ),
+            ('login lookup by email', hosts.filter(email='host@example.com'), 'INDEX'),
+        ]
+
+    def test_host_query_shapes_use_their_indexes(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Expected index names are checked against SQLite EXPLAIN QUERY PLAN output')
+        for label, queryset, index in self.query_shapes():
+            with self.subTest(label):
+                self.assertIn(index, queryset.explain())
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ETagTests(TestCase):
+
+    def test_etag_names_the_representation_and_model(self):
+        user = get_user_model().objects.create_user(
+            username='carol', email='carol@example.com', password='x', full_name='Carol'
+        )
+        host = CustomHost.objects.create(
+            pk=user.pk, username='carol', email='carol@example.com', full_name='Carol', phone_number='1',
+            version=user.version,
+        )
+        self.assertNotEqual(object_etag(host, 'host'), object_etag(host, 'verification-status'))
+        self.assertNotEqual(object_etag(user, 'user'), object_etag(host, 'user'))
+
+    def test_if_none_match_returns_304(self):
+        user = get_user_model().objects.create_user(
+            username='dave', email='dave@example.com', password='x', full_name='Dave'
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        etag = client.get('/auth/api/profile/')['ETag']
+        self.assertEqual(client.get('/auth/api/details/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class MetricsTests(TestCase):
+
+    def test_serializer_time_is_recorded_and_served_at_root(self):
+        metrics.registry.clear()
+        response = APIClient(REMOTE_ADDR='10.1.0.3').post('/auth/api/register/', {
+            'username': 'erin', 'email': 'erin@example.com', 'full_name': 'Erin', 'phone_number': '1',
+            'password': 'Str0ng-passw0rd!', 'password_confirm': 'Str0ng-passw0rd!',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertGreater(metrics.registry.view('api_register').serializer.sum, 0)
+
+        # The query timer is attached by HostAuthConfig.ready()
+        self.assertGreater(metrics.registry.view('api_register').queries.sum, 0)
+
+        with self.settings(METRICS_TOKEN='scrape-secret'):
+            scrape = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(scrape.status_code, 200)
+        self.assertIn(b'origon_request_serializer_duration_seconds_count{view="api_register"} 1', scrape.content)
+        for metric in (b'origon_hashing_pool_queue_depth ', b'origon_hashing_pool_wait_seconds_count ',
+                       b'origon_json_render_seconds_count{encoder='):
+            self.assertIn(metric, scrape.content)
+
+    def test_scrapes_need_staff_or_the_token(self):
+        with self.settings(METRICS_TOKEN='scrape-secret'):
+            self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='127.0.0.1').status_code, 403)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+        staff = get_user_model().objects.create_user(
+            username='staff', email='staff@example.com', password='x', full_name='Staff', is_staff=True
+        )
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+
+class HostFacetTests(TestCase):
+
+    def facet(self, field, value):
+        return HostFacet.objects.filter(field=field, value=value).values_list('count', flat=True).first()
+
+    def test_host_admin_is_registered_with_the_facet_changelist(self):
+        host_admin = admin.site._registry[CustomHost]
+        self.assertIs(host_admin.get_changelist(None), FacetChangeList)
+        self.assertIsInstance(admin.site._registry[HostBulkJob], HostBulkJobAdmin)
+
+    def test_saves_move_the_facet_counts(self):
+        host = CustomHost.objects.create(
+            username='gina', email='gina@example.com', full_name='Gina', phone_number='1', city='Lagos'
+        )
+        self.assertEqual((self.facet(*facets.TOTAL), self.facet('city', 'Lagos')), (1, 1))
+
+        host.city = 'Abuja'
+        host.save()
+        self.assertEqual((self.facet('city', 'Lagos'), self.facet('city', 'Abuja')), (0, 1))
+
+        host.delete()
+        self.assertEqual((self.facet(*facets.TOTAL), self.facet('city', 'Abuja')), (0, 0))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class HostChangelistPaginationTests(TestCase):
+
+    def setUp(self):
+        for number in range(5):
+            CustomHost.objects.create(
+                username=f'host{number}', email=f'host{number}@example.com', full_name='Host', phone_number='1'
+            )
+        admin_user = get_user_model().objects.create_superuser(
+            username='admin', email='admin@example.com', password='x', full_name='Admin'
+        )
+        self.client.force_login(admin_user)
+        patcher = mock.patch.object(admin.site._registry[CustomHost], 'list_per_page', 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def changelist(self, **params):
+        return self.client.get('/admin/host_auth/customhost/', params)
+
+    def test_pages_are_bounded_by_rows_not_the_facet_total(self):
+        # A stale facet total must not create or hide pages
+        field, value = facets.TOTAL
+        HostFacet.objects.filter(field=field, value=value).update(count=50)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.changelist()
+        self.assertFalse([q for q in queries if q['sql'].startswith('SELECT COUNT(*) AS "__count" FROM "host_auth')])
+        cl = response.context['cl']
+        self.assertEqual((cl.result_count, cl.paginator.num_pages, len(cl.result_list)), (50, 2, 2))
+
+        last = self.changelist(p=3).context['cl']
+        self.assertEqual((last.result_count, last.paginator.num_pages, len(last.result_list)), (5, 3, 1))
+        self.assertEqual(self.changelist(p=4).status_code, 302)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class HostAdminSearchTests(TestCase):
+
+    def test_changelist_search_uses_the_fts_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('The host search index only exists on SQLite')
+        for username, business_name in (('lagos', 'Lagos Tours'), ('abuja', 'Abuja Stays')):
+            CustomHost.objects.create(
+                username=username, email=f'{username}@example.com', full_name='Host', phone_number='1',
+                business_name=business_name,
+            )
+        admin_user = get_user_model().objects.create_superuser(
+            username='admin', email='admin@example.com', password='x', full_name='Admin'
+        )
+        self.client.force_login(admin_user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/host_auth/customhost/', {'q': 'lag'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([host.username for host in response.context['cl'].result_list], ['lagos'])
+        host_queries = [q['sql'] for q in queries if 'FROM "host_auth_customhost"' in q['sql']]
+        self.assertTrue(any('host_auth_customhost_fts MATCH' in sql for sql in host_queries))
+        self.assertFalse(any('LIKE' in sql for sql in host_queries))
+
+
+class TokenBucketLimiterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(rate_limit.time, 'monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.limiter = rate_limit.TokenBucketLimiter('test', capacity=2, per_minute=30)
+
+    def test_allows_the_burst_then_rejects(self):
+        self.assertIsNone(self.limiter.hit('a'))
+        self.assertIsNone(self.limiter.hit('a'))
+        self.assertAlmostEqual(self.limiter.hit('a'), 2.0)
+        # Buckets are per key
+        self.assertIsNone(self.limiter.hit('b'))
+        self.assertEqual(self.limiter.stats(), {'allowed': 3, 'rejected': 1, 'tracked_keys': 2})
+
+    def test_refills_at_the_rate(self):
+        self.limiter.hit('a')
+        self.limiter.hit('a')
+        self.now += 1
+        self.assertAlmostEqual(self.limiter.hit('a'), 1.0)
+        self.now += 1
+        self.assertIsNone(self.limiter.hit('a'))
+        self.now += 60
+        # Refill stops at the capacity
+        self.assertIsNone(self.limiter.hit('a'))
+        self.assertIsNone(self.limiter.hit('a'))
+        self.assertIsNotNone(self.limiter.hit('a'))
+
+
+class ClientAddressTests(SimpleTestCase):
+
+    def address(self, remote, forwarded=None):
+        request = RequestFactory().get('/', REMOTE_ADDR=remote)
+        if forwarded is not None:
+            request.META['HTTP_X_FORWARDED_FOR'] = forwarded
+        return rate_limit.client_ip(request)
+
+    @override_settings(TRUSTED_PROXIES=[])
+    def test_forwarded_for_is_ignored_without_trusted_proxies(self):
+        self.assertEqual(self.address('203.0.113.9', '198.51.100.1'), '203.0.113.9')
+
+    @override_settings(TRUSTED_PROXIES=['10.0.0.0/8'])
+    def test_trusted_proxies_are_skipped(self):
+        self.assertEqual(self.address('10.0.0.2', '198.51.100.1'), '198.51.100.1')
+        # The client can prepend anything; only the entry the proxies added counts
+        self.assertEqual(self.address('10.0.0.2', '192.0.2.7, 198.51.100.1, 10.0.0.3'), '198.51.100.1')
+        self.assertEqual(self.address('10.0.0.2'), '10.0.0.2')
+        # Not sent by a trusted proxy
+        self.assertEqual(self.address('203.0.113.9', '198.51.100.1'), '203.0.113.9')
+
+
+@override_settings(
+    TRUSTED_PROXIES=['10.0.0.0/8'], PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']
+)
+class LoginRateLimitTests(TestCase):
+
+    def setUp(self):
+        for limiter in rate_limit.limiters.values():
+            limiter.reset()
+        self.attempts = 0
+        # No refill during the test; no background audit writes
+        patchers = [mock.patch.object(rate_limit.time, 'monotonic', return_value=1000.0)]
+        patchers += [mock.patch.object(login_events, name) for name in ('flush', '_ensure_thread')]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def login(self, forwarded):
+        # A new email each time, so only the per-address limit applies
+        self.attempts += 1
+        return APIClient(REMOTE_ADDR='10.0.0.2').post(
+            '/auth/api/login/', {'email': f'nobody{self.attempts}@example.com', 'password': 'x'},
+            HTTP_X_FORWARDED_FOR=forwarded,
+        )
+
+    def test_clients_behind_the_proxy_are_limited_separately(self):
+        capacity = rate_limit.limiters['login_ip'].capacity
+        for attempt in range(capacity):
+            self.assertEqual(self.login('198.51.100.1').status_code, 400)
+        response = self.login('198.51.100.1')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(self.login('198.51.100.2').status_code, 400)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class LoginEventTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='frank', email='frank@example.com', password='Right-passw0rd!', full_name='Frank'
+        )
+        self.host = CustomHost.objects.create(
+            username='frank', email='frank@example.com', full_name='Frank', phone_number='1'
+        )
+        self.host.set_password('Right-passw0rd!')
+        self.host.save()
+        login_events.flush()
+        # Every test logs in as the same email
+        for limiter in rate_limit.limiters.values():
+            limiter.reset()
+        # Keep the background writer from draining the queue mid-test
+        for name in ('flush', '_ensure_thread'):
+            patcher = mock.patch.object(login_events, name)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def outcomes(self, url, password):
+        APIClient(REMOTE_ADDR='10.1.0.4').post(url, {'email': 'frank@example.com', 'password': password})
+        with login_events._lock:
+            events = list(login_events._events)
+            login_events._events.clear()
+        return [(account_id, outcome) for _, account_id, _, _, outcome, _ in events]
+
+    def test_sync_user_login_records_the_account(self):
+        url = '/auth/api/login/'
+        self.assertEqual(self.outcomes(url, 'wrong'), [(self.user.pk, FAILURE)])
+        self.assertEqual(self.outcomes(url, 'Right-passw0rd!'), [(self.user.pk, SUCCESS)])
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.outcomes(url, 'Right-passw0rd!'), [(self.user.pk, DISABLED)])
+
+    def test_sync_user_login_goes_through_authenticate(self):
+        failed = mock.Mock()
+        user_login_failed.connect(failed)
+        self.addCleanup(user_login_failed.disconnect, failed)
+        self.outcomes('/auth/api/login/', 'wrong')
+        failed.assert_called_once()
+
+    def test_sync_host_login_records_the_account(self):
+        url = '/host/api/login/'
+        self.assertEqual(self.outcomes(url, 'wrong'), [(self.host.pk, FAILURE)])
+        CustomHost.objects.filter(pk=self.host.pk).update(is_active=False)
+        self.assertEqual(self.outcomes(url, 'Right-passw0rd!'), [(self.host.pk, DISABLED)])
+
+
+class StartupPreloadTests(SimpleTestCase):
+    """
+    HostAuthConfig.ready() does the preloading, so it is checked in a fresh
+    interpreter rather than in this already set-up one
+    """
+
+    def setup_and_eval(self, expression, preload='1'):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+            'PYTHONPATH': os.pathsep.join(sys.path),
+            'PRELOAD_AUTH_DEPENDENCIES': preload,
+        }
+        code = f'import sys, django\ndjango.setup()\nprint({expression})'
+        result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+
+    def test_email_validator_loads_at_setup(self):
+        self.assertEqual(self.setup_and_eval("'email_validator' in sys.modules"), 'True')
+        self.assertEqual(self.setup_and_eval("'email_validator' in sys.modules", preload='0'), 'False')
+
+    def test_password_validators_are_built_at_setup(self):
+        loaded = (
+            "__import__('importlib').import_module('django.contrib.auth.password_validation')"
+            ".get_default_password_validators.cache_info().currsize"
+        )
+        self.assertEqual(self.setup_and_eval(loaded), '1')
+        self.assertEqual(self.setup_and_eval(loaded, preload='0'), '0')
+
+
+class WorkerProfileTests(SimpleTestCase):
+    """
+    WORKER_PROFILE is read when settings are imported, so each profile is
+    checked in a fresh interpreter
+    """
+
+    def setup_and_eval(self, expression, profile):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+            'PYTHONPATH': os.pathsep.join(sys.path),
+            'WORKER_PROFILE': profile,
+        }
+        env.pop('DJANGO_ROOT_URLCONF', None)
+        code = (
+            'import json, django\ndjango.setup()\nfrom django.conf import settings\n'
+            'from django.urls import get_resolver, resolve\n'
+            f'print(json.dumps({expression}))'
+        )
+        result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+        return json.loads(result.stdout)
+
+    def test_api_profile_drops_admin_sessions_and_csrf(self):
+        expression = (
+            "[settings.INSTALLED_APPS, settings.MIDDLEWARE, settings.REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES']]"
+        )
+        installed, middleware, authentication = self.setup_and_eval(expression, 'api')
+        for app in ('django.contrib.admin', 'django.contrib.sessions', 'django.contrib.messages'):
+            self.assertNotIn(app, installed)
+        self.assertNotIn('django.middleware.csrf.CsrfViewMiddleware', middleware)
+        self.assertNotIn('django.contrib.sessions.middleware.SessionMiddleware', middleware)
+        self.assertNotIn('rest_framework.authentication.SessionAuthentication', authentication)
+
+        installed, middleware, _ = self.setup_and_eval(expression, 'full')
+        self.assertIn('django.contrib.admin', installed)
+        self.assertIn('django.middleware.csrf.CsrfViewMiddleware', middleware)
+
+    def test_api_profile_serves_the_apis_without_the_admin(self):
+        expression = (
+            "[settings.ROOT_URLCONF] + "
+            "[resolve(path).url_name for path in ('/auth/api/login/', '/host/api/login/', '/metrics')]"
+        )
+        self.assertEqual(
+            self.setup_and_eval(expression, 'api'), ['origon.api_urls', 'api_login', 'api_host_login', 'metrics']
+        )
+        self.assertFalse(self.setup_and_eval("'admin' in get_resolver().namespace_dict", 'api'))
+        self.assertTrue(self.setup_and_eval("'admin' in get_resolver().namespace_dict", 'full'))
+
+
+class PreforkServerTests(SimpleTestCase):
+    """
+    Runs the prefork master with one worker on a free local port
+    """
+
+    def start_server(self, *args):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+            'PYTHONPATH': os.pathsep.join(sys.path),
+            'METRICS_TOKEN': 'scrape',
+        }
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'origon.prefork', '--bind', f'127.0.0.1:{port}', '--workers', '1', *args],
+            env=env, stderr=subprocess.PIPE, text=True,
+        )
+        self.addCleanup(server.wait, 10)
+        self.addCleanup(server.send_signal, signal.SIGTERM)
+        self.assertIn('serving on', server.stderr.readline())
+        return server, port
+
+    def test_idle_connection_neither_blocks_the_worker_nor_stays_open(self):
+        server, port = self.start_server('--timeout', '3')
+        idle = socket.create_connection(('127.0.0.1', port))
+        self.addCleanup(idle.close)
+
+        # The default threads serve other clients while one sits idle
+        request = urllib.request.Request(
+            f'http://127.0.0.1:{port}/metrics', headers={'Authorization': 'Bearer scrape'}
+        )
+        with urllib.request.urlopen(request, timeout=2) as response:
+            self.assertIn(b'origon_', response.read())
+
+        idle.settimeout(10)
+        self.assertEqual(idle.recv(1), b'')
+
+        server.send_signal(signal.SIGTERM)
+        server.wait(10)
+        self.assertNotIn('Traceback', server.stderr.read())
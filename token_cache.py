@@ -0,0 +1,224 @@
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.base_user import AbstractBaseUser
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .models import HostToken
+from .token_expiry import renewal_buffer, token_expired
+
+
+def _user_key(user):
+    # Hosts and users live in separate tables, so the pk alone is ambiguous
+    return (user._meta.label_lower, user.pk)
+
+
+class TokenCache:
+    """
+    Bounded LRU of token key -> (user, token) with a TTL and an optional
+    shared cache tier (any configured Django cache alias).
+
+    With a shared tier, every entry remembers its user's generation and is
+    only served while that still matches the one in the shared cache, so an
+    invalidation in one process evicts the user's tokens in all of them.
+    """
+
+    def __init__(self, max_entries=10000, ttl=5, shared_alias=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared_alias = shared_alias
+        self._entries = OrderedDict()
+        self._by_user = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self):
+        if self.shared_alias:
+            return caches[self.shared_alias]
+        return None
+
+    def _shared_key(self, key):
+        return f'token-cache:{key}'
+
+    def _generation_key(self, label, pk):
+        return f'token-cache-gen:{label}:{pk}'
+
+    def generation(self, label, pk):
+        shared = self.shared
+        if shared is None:
+            return None
+        return shared.get(self._generation_key(label, pk))
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                self._discard(key)
+                entry = None
+
+        shared = self.shared
+        if entry is not None:
+            if shared is None or self.generation(*_user_key(entry[1])) == entry[3]:
+                with self._lock:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                    self.hits += 1
+                return entry[1], entry[2]
+            # Invalidated by another process since it was cached
+            with self._lock:
+                self._discard(key)
+
+        if shared is not None:
+            cached = shared.get(self._shared_key(key))
+            if cached is not None:
+                user, token, generation = cached
+                if self.generation(*_user_key(user)) == generation:
+                    self._store(key, user, token, generation)
+                    self.shared_hits += 1
+                    return user, token
+                shared.delete(self._shared_key(key))
+
+        self.misses += 1
+        return None
+
+    def set(self, key, user, token, generation=None):
+        self._store(key, user, token, generation)
+        shared = self.shared
+        if shared is not None:
+            shared.set(self._shared_key(key), (user, token, generation), self.ttl)
+
+    def _store(self, key, user, token, generation=None):
+        if self.max_entries <= 0:
+            return
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (expires, user, token, generation)
+            self._by_user.setdefault(_user_key(user), set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+
+    def _discard(self, key):
+        # Caller must hold the lock
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_key = _user_key(entry[1])
+        keys = self._by_user.get(user_key)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[user_key]
+
+    def delete(self, key):
+        with self._lock:
+            self._discard(key)
+        shared = self.shared
+        if shared is not None:
+            shared.delete(self._shared_key(key))
+
+    def invalidate_user(self, user):
+        self.invalidate_users(user._meta.label_lower, [user.pk])
+
+    def invalidate_users(self, label, pks):
+        with self._lock:
+            for pk in pks:
+                for key in list(self._by_user.get((label, pk), ())):
+                    self._discard(key)
+        shared = self.shared
+        if shared is not None and pks:
+            # A new generation orphans the user's entries in every process;
+            # it only has to outlive them
+            generation = uuid.uuid4().hex
+            shared.set_many(
+                {self._generation_key(label, pk): generation for pk in pks}, self.ttl + 60
+            )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _build_cache():
+    options = getattr(settings, 'TOKEN_CACHE', {})
+    return TokenCache(
+        max_entries=options.get('MAX_ENTRIES', 10000),
+        ttl=options.get('TTL', 5),
+        shared_alias=options.get('SHARED_CACHE_ALIAS'),
+    )
+
+
+token_cache = _build_cache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for TokenAuthentication that skips the Token/user
+    join for recently seen tokens. Host keys (HostToken) are accepted under
+    the same keyword.
+    """
+
+    def lookup(self, key):
+        for model in (Token, HostToken):
+            try:
+                token = model.objects.select_related('user').get(key=key)
+            except model.DoesNotExist:
+                continue
+            if not token.user.is_active:
+                raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+            return token.user, token
+        raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            user, token = self.lookup(key)
+            token_cache.set(key, user, token, token_cache.generation(*_user_key(user)))
+        else:
+            user, token = cached
+            # Views mutate request.user, so never hand out the cached instance
+            user = copy.copy(user)
+
+        if token_expired(token):
+            token_cache.delete(key)
+            raise exceptions.AuthenticationFailed('Token has expired.')
+        renewal_buffer.touch(token)
+        return user, token
+
+
+def _token_deleted(sender, instance, **kwargs):
+    # Fired for logout (token.delete()) and password change (queryset delete).
+    # Other processes may hold the token too, so bump its user's generation,
+    # and only once committed so none of them can re-cache the old row
+    label = sender._meta.get_field('user').related_model._meta.label_lower
+    token_cache.delete(instance.key)
+    transaction.on_commit(lambda: token_cache.invalidate_users(label, [instance.user_id]))
+
+
+def _user_saved(sender, instance, **kwargs):
+    if isinstance(instance, AbstractBaseUser):
+        transaction.on_commit(lambda: token_cache.invalidate_user(instance))
+
+
+post_delete.connect(_token_deleted, sender=Token, dispatch_uid='token_cache_token_deleted')
+post_delete.connect(_token_deleted, sender=HostToken, dispatch_uid='token_cache_host_token_deleted')
+post_save.connect(_user_saved, dispatch_uid='token_cache_user_saved')
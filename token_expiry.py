@@ -0,0 +1,118 @@
+import atexit
+import os
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+# Token.created doubles as the token's last renewal: a token expires TTL
+# seconds after it was created or last renewed, and use renews it.
+
+
+def expiry_options():
+    options = getattr(settings, 'TOKEN_EXPIRY', {})
+    return {
+        'TTL': options.get('TTL', 14 * 24 * 3600),
+        'RENEW_AFTER': options.get('RENEW_AFTER', 3600),
+        'FLUSH_INTERVAL': options.get('FLUSH_INTERVAL', 30),
+    }
+
+
+def expired_before():
+    return timezone.now() - timedelta(seconds=expiry_options()['TTL'])
+
+
+def token_expired(token):
+    return token.created < expired_before()
+
+
+class RenewalBuffer:
+    """
+    Collects tokens due for renewal; a background thread writes them in one
+    UPDATE every flush_interval seconds, so busy tokens cost one write per
+    renew_after window instead of one per request, and never one inside
+    a request
+    """
+
+    def __init__(self, renew_after=3600, flush_interval=30):
+        self.renew_after = timedelta(seconds=renew_after)
+        self.flush_interval = flush_interval
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.flushed = 0
+
+    def touch(self, token):
+        now = timezone.now()
+        if now - token.created < self.renew_after:
+            return
+        # Also bumps the cached Token instance, so it is not queued again
+        token.created = now
+        with self._lock:
+            self._pending.add((type(token), token.key))
+        self._ensure_thread()
+
+    def _ensure_thread(self):
+        # Started on first use, and again in a forked worker, which does not
+        # inherit its parent's threads
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='token-renewals', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except DatabaseError:
+                pass
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        if not pending:
+            return 0
+        now = timezone.now()
+        # User and host tokens live in separate tables
+        keys_by_model = {}
+        for model, key in pending:
+            keys_by_model.setdefault(model, []).append(key)
+        try:
+            for model, keys in keys_by_model.items():
+                for start in range(0, len(keys), 500):
+                    model.objects.filter(key__in=keys[start:start + 500]).update(created=now)
+        except DatabaseError:
+            # Keep them for the next flush rather than drop renewals
+            with self._lock:
+                self._pending.update(pending)
+            raise
+        self.flushed += len(pending)
+        return len(pending)
+
+    def __len__(self):
+        return len(self._pending)
+
+
+def _build_buffer():
+    options = expiry_options()
+    return RenewalBuffer(options['RENEW_AFTER'], options['FLUSH_INTERVAL'])
+
+
+renewal_buffer = _build_buffer()
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        renewal_buffer.flush()
+    except Exception:
+        pass
@@ -2,15 +2,24 @@ from rest_framework import status, generics, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate, login, logout
-from origon.host_auth.models import CustomHost
+from django.db import IntegrityError, transaction
+from .models import CustomHost, HostToken
+from .hashing import HashingPoolFull, bulk_hashing_pool
+from .auth_tokens import issue_tokens, is_signed_token, revoke_request_tokens, signed_mode
+from .facets import record_created
+from .login_events import SUCCESS, record_login
+from .rate_limit import LoginRateThrottle, RegisterRateThrottle, rate_limit_stats
+from .renderers import StreamingJSONResponse
+from .search import search_hosts
+from .versioning import conditional_response
 from .serializers import (
     HostRegistrationSerializer, 
     HostLoginSerializer, 
-    HostSerializer, 
+    FastHostSerializer, 
     HostProfileSerializer,
-    ChangeHostPasswordSerializer
+    ChangeHostPasswordSerializer,
+    build_host
 )
 
 
@@ -21,38 +30,147 @@ class HostRegisterAPIView(generics.CreateAPIView):
     queryset = CustomHost.objects.all()
     serializer_class = HostRegistrationSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [RegisterRateThrottle]
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             host = serializer.save()
-            token, created = Token.objects.get_or_create(user=host)
             return Response({
                 'message': 'Host registered successfully',
-                'host': HostSerializer(host).data,
-                'token': token.key
+                'host': FastHostSerializer(host).data,
+                **issue_tokens(host)
             }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class IsAgencyOrStaff(permissions.BasePermission):
+    message = 'Only agencies and staff can onboard hosts in bulk.'
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(
+            user and user.is_authenticated and
+            (user.is_staff or getattr(user, 'business_type', None) == 'agency')
+        )
+
+
+class HostBulkRegisterAPIView(APIView):
+    """
+    API view for onboarding a batch of hosts in one request.
+    Invalid rows are reported by index and do not block the valid ones.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAgencyOrStaff]
+    max_rows = 100
+
+    def post(self, request):
+        rows = request.data.get('hosts') if isinstance(request.data, dict) else request.data
+        if not isinstance(rows, list) or not rows:
+            return Response({'detail': 'Expected a non-empty list of hosts.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > self.max_rows:
+            return Response(
+                {'detail': f'At most {self.max_rows} hosts can be registered per request.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        errors = []
+        valid = []
+        seen_emails = set()
+        seen_usernames = set()
+        for index, row in enumerate(rows):
+            serializer = HostRegistrationSerializer(data=row)
+            if not serializer.is_valid():
+                errors.append({'index': index, 'errors': serializer.errors})
+                continue
+            vald = serializer.validated_data
+            # The serializer only checks the database, not the rest of the batch
+            if vald['email'] in seen_emails:
+                errors.append({'index': index, 'errors': {'email': ['Duplicate email in this batch.']}})
+                continue
+            if vald['username'] in seen_usernames:
+                errors.append({'index': index, 'errors': {'username': ['Duplicate username in this batch.']}})
+                continue
+            seen_emails.add(vald['email'])
+            seen_usernames.add(vald['username'])
+            valid.append((index, vald))
+
+        created = []
+        if valid:
+            try:
+                encoded = bulk_hashing_pool.make_passwords([vald['password'] for _, vald in valid])
+            except HashingPoolFull:
+                return Response(
+                    {'detail': 'Bulk registration is busy, please retry shortly.'},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+            pending = [
+                (index, build_host(vald, encoded_password))
+                for (index, vald), encoded_password in zip(valid, encoded)
+            ]
+            for index, host, token in self.insert_hosts(pending, errors):
+                created.append({'index': index, 'host': FastHostSerializer(host).data, **issue_tokens(host, token)})
+
+        errors.sort(key=lambda error: error['index'])
+        return Response(
+            {'created': created, 'errors': errors},
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+        )
+
+    def insert_hosts(self, pending, errors):
+        try:
+            with transaction.atomic():
+                hosts = CustomHost.objects.bulk_create([host for _, host in pending])
+                if signed_mode():
+                    # Signed tokens are issued per host without any table
+                    tokens = [None] * len(hosts)
+                else:
+                    # bulk_create skips HostToken.save(), which is where keys are generated
+                    tokens = HostToken.objects.bulk_create(
+                        [HostToken(key=HostToken.generate_key(), user=host) for host in hosts]
+                    )
+                record_created(hosts)
+            return [(index, host, token) for (index, _), host, token in zip(pending, hosts, tokens)]
+        except IntegrityError:
+            pass
+
+        # A concurrent signup claimed one of the emails/usernames after
+        # validation; fall back to per-row inserts to isolate it.
+        inserted = []
+        for index, host in pending:
+            host.pk = None
+            host._state.adding = True
+            try:
+                with transaction.atomic():
+                    host.save()
+                    token = None if signed_mode() else HostToken.objects.create(user=host)
+            except IntegrityError:
+                errors.append({
+                    'index': index,
+                    'errors': {'non_field_errors': ['A host with this email or username already exists.']}
+                })
+                continue
+            inserted.append((index, host, token))
+        return inserted
+
+
 class HostLoginAPIView(APIView):
     """
     API view for host login
     """
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [LoginRateThrottle]
 
     def post(self, request):
         serializer = HostLoginSerializer(data=request.data)
         if serializer.is_valid():
             host = serializer.validated_data['host']
-            if not host.is_active:
-                return Response({'detail': 'Host account is disabled.'}, status=status.HTTP_403_FORBIDDEN)
-            token, created = Token.objects.get_or_create(user=host)
+            record_login('host', request, SUCCESS, host)
             return Response({
                 'message': 'Host login successful',
-                'host': HostSerializer(host).data,
-                'token': token.key
+                'host': FastHostSerializer(host).data,
+                **issue_tokens(host)
             }, status=status.HTTP_200_OK)
+        record_login('host', request, serializer.login_outcome, serializer.account, request.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -63,6 +181,12 @@ class HostLogoutAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
+        if is_signed_token(request.auth):
+            # Signed tokens cannot be deleted, so they are revoked instead
+            revoke_request_tokens(request)
+            return Response({
+                'message': 'Host successfully logged out'
+            }, status=status.HTTP_200_OK)
         try:
             # Delete the host's token to logout
             request.user.auth_token.delete()
@@ -87,8 +211,9 @@ class HostProfileAPIView(generics.RetrieveUpdateAPIView):
 
     def get(self, request, *args, **kwargs):
         host = self.get_object()
-        serializer = HostSerializer(host)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return conditional_response(
+            request, host, 'host', lambda: Response(FastHostSerializer(host).data, status=status.HTTP_200_OK)
+        )
 
 
 class ChangeHostPasswordAPIView(APIView):
@@ -103,8 +228,9 @@ class ChangeHostPasswordAPIView(APIView):
             host = request.user
             host.set_password(serializer.validated_data['new_password'])
             host.save()
-            # Delete all tokens to force re-login
-            Token.objects.filter(user=host).delete()
+            # Delete all tokens to force re-login; signed tokens are already
+            # invalid because they carry a digest of the old password hash
+            HostToken.objects.filter(user=host).delete()
             return Response({
                 'message': 'Password changed successfully. Please login again.'
             }, status=status.HTTP_200_OK)
@@ -117,8 +243,10 @@ def host_detail_view(request):
     """
     API view to get current host details
     """
-    serializer = HostSerializer(request.user)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return conditional_response(
+        request, request.user, 'host',
+        lambda: Response(FastHostSerializer(request.user).data, status=status.HTTP_200_OK)
+    )
 
 
 @api_view(['GET'])
@@ -128,8 +256,47 @@ def host_verification_status(request):
     API view to check host verification status
     """
     host = request.user
-    return Response({
+    return conditional_response(request, host, 'verification-status', lambda: Response({
         'is_verified': host.is_verified,
         'verification_message': 'Verified host' if host.is_verified else 'Pending verification',
         'can_list_properties': host.is_verified and host.is_active
-    }, status=status.HTTP_200_OK)
\ No newline at end of file
+    }, status=status.HTTP_200_OK))
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def host_export_view(request):
+    """
+    API view streaming every host as a JSON array, for staff exports.
+    Rows are read and encoded in chunks, never all at once.
+    """
+    hosts = CustomHost.objects.order_by('id')
+    return StreamingJSONResponse(FastHostSerializer.iter_queryset(hosts))
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def host_search_view(request):
+    """
+    API view for ranked host search over email, name, business name, phone
+    and city; every word of `q` is matched as a prefix
+    """
+    term = request.query_params.get('q', '').strip()
+    if not term:
+        return Response({'q': ['This query parameter is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+    except ValueError:
+        return Response({'limit': ['A valid integer is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    hosts = FastHostSerializer.only(search_hosts(term, limit))
+    return Response({'q': term, 'results': FastHostSerializer(hosts, many=True).data}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def auth_rate_limit_stats_view(request):
+    """
+    API view reporting allowed/rejected attempt counters of this worker's
+    login and registration rate limiters
+    """
+    return Response(rate_limit_stats(), status=status.HTTP_200_OK)